@@ -1,14 +1,27 @@
+import codecs
 import os
-import requests
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import urlsplit, parse_qsl, urlencode
+from urllib3.exceptions import ReadTimeoutError
 from bs4 import BeautifulSoup
 from flask import Flask, request, render_template, jsonify
 from dotenv import load_dotenv
 from openai import OpenAI
+from cache import SQLiteCache, make_key
+import database as db
+import http_client
+import image_probe
+import page_parser
+import rate_limit
 
 # Load environment variables
 load_dotenv()
 
 TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
+TAVILY_URL = 'https://api.tavily.com/search'
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
 # Initialize OpenAI client
@@ -18,170 +31,515 @@ if not OPENAI_API_KEY:
 else:
     client = OpenAI(api_key=OPENAI_API_KEY)
 
+HEADSHOT_MODEL = "gpt-4o-mini"
+# Stored headshot verdicts are only reused for the same model and prompt;
+# bump HEADSHOT_PROMPT_VERSION whenever headshot_messages changes
+HEADSHOT_PROMPT_VERSION = 1
+HEADSHOT_VERDICT_MODEL = f"{HEADSHOT_MODEL}/v{HEADSHOT_PROMPT_VERSION}"
+SUMMARY_MODEL = "gpt-4o-mini"
+# Per-profile text budget when many profiles share one summary request
+BATCH_TEXT_CHARS = 6000
+
+# Page fetching fan-out: how many pages to fetch at once and how long a
+# single search may spend waiting on them before falling back to Tavily content
+FETCH_WORKERS = int(os.getenv("FETCH_WORKERS", "6"))
+FETCH_DEADLINE = float(os.getenv("FETCH_DEADLINE", "15"))
+
+# Headshot validation fan-out: concurrent vision calls, and the confidence
+# at which we stop looking for a better image
+VALIDATE_WORKERS = int(os.getenv("VALIDATE_WORKERS", "4"))
+HEADSHOT_STOP_CONFIDENCE = 85
+
+# Page fetches, image probes and headshot checks run on long-lived thread
+# pools shared by every request, so worker threads (and their pooled
+# connections) outlive a single search. Each pool has room for this many
+# searches running their full fan-out at once.
+POOL_REQUESTS = int(os.getenv("POOL_REQUESTS", "4"))
+POOL_WORKERS = {
+    'fetch': FETCH_WORKERS * POOL_REQUESTS,
+    'probe': image_probe.PROBE_WORKERS * POOL_REQUESTS,
+    'validate': VALIDATE_WORKERS * POOL_REQUESTS,
+}
+
+# Query parameters that only change image size/format/signature, not the picture itself
+IMAGE_VARIANT_PARAMS = {
+    'w', 'h', 'width', 'height', 'size', 's', 'sz', 'q', 'quality', 'fit', 'crop',
+    'format', 'fm', 'auto', 'dpr', 'resize', 'e', 'v', 't', 'token', 'ts'
+}
+
+TAVILY_READ_TIMEOUT = float(os.getenv("TAVILY_READ_TIMEOUT", "30"))
+
+# Tavily responses are cached on disk, keyed by normalized query + search params
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", str(24 * 3600)))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "5000"))
+search_cache = SQLiteCache('tavily', ttl=SEARCH_CACHE_TTL, max_entries=SEARCH_CACHE_MAX_ENTRIES)
+
+# Extracted (text, image_url) per fetched page. Fresh entries skip the network
+# entirely; stale ones are revalidated with ETag/Last-Modified before refetching.
+PAGE_CACHE_TTL = int(os.getenv("PAGE_CACHE_TTL", "3600"))
+PAGE_CACHE_MAX_AGE = int(os.getenv("PAGE_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+page_cache = SQLiteCache('pages', ttl=PAGE_CACHE_TTL, max_bytes=PAGE_CACHE_MAX_BYTES, max_age=PAGE_CACHE_MAX_AGE)
+
+# Generated bios, keyed on the inputs that determine them. Bump SUMMARY_PROMPT_VERSION
+# whenever bio_prompt/batch_bio_prompt change so old bios are no longer reused.
+SUMMARY_PROMPT_VERSION = 1
+SUMMARY_CACHE_TTL = int(os.getenv("SUMMARY_CACHE_TTL", str(30 * 24 * 3600)))
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "20000"))
+summary_cache = SQLiteCache('summaries', ttl=SUMMARY_CACHE_TTL, max_entries=SUMMARY_CACHE_MAX_ENTRIES)
+
+PAGE_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+# Page downloads are streamed and cut off at PAGE_MAX_BYTES (after decompression)
+# or PAGE_DOWNLOAD_TIMEOUT seconds; anything that isn't HTML is dropped unread
+PAGE_MAX_BYTES = int(os.getenv("PAGE_MAX_BYTES", str(1024 * 1024)))
+PAGE_DOWNLOAD_TIMEOUT = float(os.getenv("PAGE_DOWNLOAD_TIMEOUT", "10"))
+PAGE_CHUNK_BYTES = 16 * 1024
+PAGE_CONTENT_TYPES = {'text/html', 'application/xhtml+xml', 'text/plain'}
+# How far into the body to look for a <meta charset> declaration
+CHARSET_SNIFF_BYTES = 4096
+
+# 'fast' parses pages in one pass with page_parser; 'soup' builds a full
+# BeautifulSoup tree (slower, kept for comparing the two)
+PAGE_PARSER = os.getenv("PAGE_PARSER", "fast")
+
+CHARSET_RE = re.compile(rb'charset\s*=\s*["\']?\s*([A-Za-z0-9._:-]+)', re.I)
+META_CHARSET_RE = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([A-Za-z0-9._:-]+)', re.I)
+
 app = Flask(__name__)
 
-def tavily_search(query):
-    url = 'https://api.tavily.com/search'
+def normalize_query(query):
+    """Lowercase and collapse whitespace so trivially different queries share a cache entry"""
+    return ' '.join(query.lower().split())
+
+def tavily_cache_key(data):
+    """Cache key for a Tavily request: normalized query plus every other search parameter"""
+    return make_key(dict(data, query=normalize_query(data['query'])))
+
+def tavily_request(data):
+    """
+    POST a search to Tavily and return the decoded response.
+    Repeats of the same normalized query and parameters are served from the cache.
+    """
+    key = tavily_cache_key(data)
+    cached = search_cache.get(key)
+    if cached is not None:
+        return cached
+
+    rate_limit.acquire('tavily')
     headers = {'Authorization': f'Bearer {TAVILY_API_KEY}'}
-    data = {
+    # Advanced searches can take a while server-side, so allow a longer read
+    response = http_client.post(TAVILY_URL, headers=headers, json=data,
+                                timeout=(http_client.CONNECT_TIMEOUT, TAVILY_READ_TIMEOUT))
+    response.raise_for_status()
+    result = response.json()
+    search_cache.set(key, result)
+    return result
+
+def tavily_search_data(query):
+    """Request body for the main profile search"""
+    return {
         'query': query,
         'search_depth': 'advanced',
         'include_answer': False,
         'include_domains': ['linkedin.com', 'crunchbase.com', 'net2phone.com', 'medium.com', 'twitter.com', 'x.com'],
         'max_results': 10  # Increased to get more candidates
     }
-    response = requests.post(url, headers=headers, json=data)
-    response.raise_for_status()
-    results = response.json()['results']
+
+def tavily_search(query):
+    results = tavily_request(tavily_search_data(query))['results']
     # Return both URL and content from Tavily
     return [(r['url'], r.get('content', '')) for r in results]
 
-def search_person_images_google(name, company):
-    """
-    Use Tavily to specifically search for person images
-    """
-    url = 'https://api.tavily.com/search'
-    headers = {'Authorization': f'Bearer {TAVILY_API_KEY}'}
+def image_search_data(name, company):
+    """Request body for the dedicated headshot image search"""
     query = f"{name} {company} headshot photo profile picture" if company else f"{name} headshot photo"
-    data = {
+    return {
         'query': query,
         'search_depth': 'basic',
         'include_images': True,
         'max_results': 5
     }
+
+def search_person_images_google(name, company):
+    """
+    Use Tavily to specifically search for person images
+    """
     try:
-        response = requests.post(url, headers=headers, json=data)
-        response.raise_for_status()
-        result = response.json()
+        result = tavily_request(image_search_data(name, company))
         # Return image URLs if available
         return result.get('images', [])
     except:
         return []
 
 def extract_text_and_image(url, name):
+    """
+    Fetch a page and extract its text and best headshot candidate.
+    Results are cached per URL (and name, since image scoring depends on it);
+    stale entries are revalidated with a conditional GET so a 304 skips the parse.
+    """
     try:
-        r = requests.get(url, timeout=10, headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'})
-        soup = BeautifulSoup(r.text, 'html.parser')
-
-        # Extract text
-        paragraphs = soup.find_all(['p', 'h1', 'h2', 'h3'])
-        text = ' '.join([p.get_text(strip=True) for p in paragraphs])
-
-        image_url = ''
-
-        # Strategy 1: LinkedIn-specific selectors
-        if 'linkedin.com' in url.lower():
-            # LinkedIn profile images have specific classes
-            linkedin_img = soup.find('img', {'class': lambda c: c and any(x in str(c).lower() for x in ['profile', 'avatar', 'photo'])})
-            if linkedin_img and linkedin_img.get('src'):
-                image_url = linkedin_img.get('src')
-
-        # Strategy 2: Look for structured data (JSON-LD)
-        if not image_url:
-            json_ld = soup.find_all('script', {'type': 'application/ld+json'})
-            for script in json_ld:
-                try:
-                    import json
-                    data = json.loads(script.string)
-                    if isinstance(data, dict):
-                        if data.get('@type') == 'Person' and data.get('image'):
-                            image_url = data.get('image')
+        key = page_cache_key(url, name)
+        cached, fresh = page_cache.lookup(key)
+        if fresh:
+            return cached['text'], cached['image_url']
+
+        rate_limit.acquire('hosts', urlsplit(url).netloc.lower())
+        with http_client.get(url, headers=page_request_headers(cached), stream=True) as r:
+            if cached and r.status_code == 304:
+                page_cache.refresh(key)
+                return cached['text'], cached['image_url']
+
+            if is_html_response(r.headers):
+                body = read_capped(r)
+                text, image_url = parse_page(decode_page(body, r.headers.get('Content-Type')), url, name)
+            else:
+                # PDFs, images, downloads - nothing for parse_page, don't read them
+                text, image_url = '', ''
+
+            # Don't cache error pages - they are usually transient blocks
+            if r.ok:
+                page_cache.set(key, page_cache_entry(text, image_url, r.headers))
+
+        return text, image_url
+    except Exception:
+        return '', ''
+
+def is_html_response(headers):
+    """True if a response's Content-Type says it's a page worth parsing (a missing header counts)"""
+    content_type = headers.get('Content-Type', '').split(';')[0].strip().lower()
+    return not content_type or content_type in PAGE_CONTENT_TYPES
+
+def read_capped(response, max_bytes=PAGE_MAX_BYTES, timeout=PAGE_DOWNLOAD_TIMEOUT):
+    """
+    Read a streamed response's body, stopping at max_bytes or once timeout
+    seconds have passed. Before each read the socket timeout is cut to the
+    time left, so a server trickling bytes can't hold it open past the deadline.
+    """
+    raw = response.raw
+    sock = getattr(raw.connection, 'sock', None)
+    body = bytearray()
+    stop_at = time.monotonic() + timeout
+    while len(body) < max_bytes:
+        remaining = stop_at - time.monotonic()
+        if remaining <= 0:
+            break
+        if sock is not None:
+            sock.settimeout(remaining)
+        try:
+            # read1 returns whatever one socket read brings, instead of waiting for a full chunk
+            chunk = raw.read1(PAGE_CHUNK_BYTES, decode_content=True)
+        except (ReadTimeoutError, TimeoutError):
+            break
+        if not chunk:
+            break
+        body += chunk
+    return bytes(body[:max_bytes])
+
+def decode_page(body, content_type=None):
+    """
+    Decode a page body using the charset from its Content-Type header, else a
+    BOM or <meta charset> near the top of the document, else UTF-8.
+    Undecodable bytes are replaced rather than failing the page.
+    """
+    encoding = None
+    if content_type:
+        match = CHARSET_RE.search(content_type.encode('latin-1', 'replace'))
+        encoding = match and valid_encoding(match.group(1))
+    if not encoding:
+        if body.startswith(codecs.BOM_UTF8):
+            encoding = 'utf-8-sig'
+        elif body.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            encoding = 'utf-16'
+    if not encoding:
+        match = META_CHARSET_RE.search(body[:CHARSET_SNIFF_BYTES])
+        encoding = match and valid_encoding(match.group(1))
+    return body.decode(encoding or 'utf-8', errors='replace')
+
+def valid_encoding(label):
+    """Python codec name for a charset label, or None if it isn't one we know"""
+    try:
+        return codecs.lookup(label.decode('ascii')).name
+    except (LookupError, UnicodeDecodeError):
+        return None
+
+def page_cache_key(url, name):
+    return make_key(url, normalize_query(name))
+
+def page_request_headers(cached=None):
+    """Headers for a page fetch, conditional if we hold a stale cached copy"""
+    headers = {'User-Agent': PAGE_USER_AGENT}
+    if cached:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+    return headers
+
+def page_cache_entry(text, image_url, response_headers):
+    return {
+        'text': text,
+        'image_url': image_url,
+        'etag': response_headers.get('ETag'),
+        'last_modified': response_headers.get('Last-Modified')
+    }
+
+def parse_page(html, url, name):
+    """Extract (text, image_url) from a page's HTML"""
+    if PAGE_PARSER == 'soup':
+        return parse_page_soup(html, url, name)
+    return page_parser.extract(html, url, name)
+
+def parse_page_soup(html, url, name):
+    """parse_page on a full BeautifulSoup tree"""
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # Extract text
+    paragraphs = soup.find_all(['p', 'h1', 'h2', 'h3'])
+    text = ' '.join([p.get_text(strip=True) for p in paragraphs])
+
+    image_url = ''
+
+    # Strategy 1: LinkedIn-specific selectors
+    if 'linkedin.com' in url.lower():
+        # LinkedIn profile images have specific classes
+        linkedin_img = soup.find('img', {'class': lambda c: c and any(x in str(c).lower() for x in ['profile', 'avatar', 'photo'])})
+        if linkedin_img and linkedin_img.get('src'):
+            image_url = linkedin_img.get('src')
+
+    # Strategy 2: Look for structured data (JSON-LD)
+    if not image_url:
+        json_ld = soup.find_all('script', {'type': 'application/ld+json'})
+        for script in json_ld:
+            try:
+                import json
+                data = json.loads(script.string)
+                if isinstance(data, dict):
+                    if data.get('@type') == 'Person' and data.get('image'):
+                        image_url = data.get('image')
+                        break
+                elif isinstance(data, list):
+                    for item in data:
+                        if isinstance(item, dict) and item.get('@type') == 'Person' and item.get('image'):
+                            image_url = item.get('image')
                             break
-                    elif isinstance(data, list):
-                        for item in data:
-                            if isinstance(item, dict) and item.get('@type') == 'Person' and item.get('image'):
-                                image_url = item.get('image')
-                                break
-                except:
-                    continue
+            except:
+                continue
 
-        # Strategy 3: Look for images with person-related attributes
-        if not image_url:
-            name_parts = [part.lower() for part in name.split()]
-            imgs = soup.find_all('img')
+    # Strategy 3: Look for images with person-related attributes
+    if not image_url:
+        name_parts = [part.lower() for part in name.split()]
+        imgs = soup.find_all('img')
 
-            scored_images = []
-            for img in imgs:
-                src = img.get('src', '')
-                alt = img.get('alt', '').lower()
-                title = img.get('title', '').lower()
-                img_class = ' '.join(img.get('class', [])).lower() if img.get('class') else ''
+        scored_images = []
+        for img in imgs:
+            src = img.get('src', '')
+            alt = img.get('alt', '').lower()
+            title = img.get('title', '').lower()
+            img_class = ' '.join(img.get('class', [])).lower() if img.get('class') else ''
 
-                # Skip obviously bad images
-                if any(bad in src.lower() for bad in ['logo', 'icon', 'banner', 'cover', 'background', '.svg', 'illustration', 'cartoon', 'graphic', 'placeholder']):
-                    continue
-                if any(bad in alt for bad in ['illustration', 'cartoon', 'graphic', 'icon']):
-                    continue
-                if not src or src.startswith('data:'):
-                    continue
+            # Skip obviously bad images
+            if any(bad in src.lower() for bad in ['logo', 'icon', 'banner', 'cover', 'background', '.svg', 'illustration', 'cartoon', 'graphic', 'placeholder']):
+                continue
+            if any(bad in alt for bad in ['illustration', 'cartoon', 'graphic', 'icon']):
+                continue
+            if not src or src.startswith('data:'):
+                continue
 
-                score = 0
-
-                # High-value keywords
-                if any(k in alt for k in ['headshot', 'portrait', 'professional photo']):
-                    score += 10
-                if any(k in img_class for k in ['profile', 'headshot', 'avatar', 'photo', 'portrait']):
-                    score += 8
-                if any(k in src.lower() for k in ['profile', 'headshot', 'avatar', 'portrait']):
-                    score += 7
-
-                # Name matching
-                if all(part in alt or part in src.lower() or part in title for part in name_parts):
-                    score += 15
-                elif any(part in alt or part in src.lower() or part in title for part in name_parts):
-                    score += 5
-
-                # Size hints (bigger is more likely to be a headshot)
-                width = img.get('width', '')
-                height = img.get('height', '')
-                if width and height:
-                    try:
-                        w, h = int(width), int(height)
-                        if 150 <= w <= 800 and 150 <= h <= 800:
-                            score += 3
-                    except:
-                        pass
-
-                if score > 0:
-                    scored_images.append((score, src))
-
-            if scored_images:
-                scored_images.sort(reverse=True, key=lambda x: x[0])
-                image_url = scored_images[0][1]
-
-        # Strategy 4: Fallback to og:image but with validation
-        if not image_url:
-            og_image = soup.find('meta', property='og:image')
-            if og_image and og_image.get('content'):
-                og_url = og_image['content']
-                # Only use og:image if it doesn't look like a generic asset
-                if not any(bad in og_url.lower() for bad in ['logo', 'banner', 'cover', 'default', 'og-image']):
-                    image_url = og_url
-
-        # Ensure absolute URL
-        if image_url and not image_url.startswith('http'):
-            from urllib.parse import urljoin
-            image_url = urljoin(url, image_url)
+            score = 0
+
+            # High-value keywords
+            if any(k in alt for k in ['headshot', 'portrait', 'professional photo']):
+                score += 10
+            if any(k in img_class for k in ['profile', 'headshot', 'avatar', 'photo', 'portrait']):
+                score += 8
+            if any(k in src.lower() for k in ['profile', 'headshot', 'avatar', 'portrait']):
+                score += 7
+
+            # Name matching
+            if all(part in alt or part in src.lower() or part in title for part in name_parts):
+                score += 15
+            elif any(part in alt or part in src.lower() or part in title for part in name_parts):
+                score += 5
+
+            # Size hints (bigger is more likely to be a headshot)
+            width = img.get('width', '')
+            height = img.get('height', '')
+            if width and height:
+                try:
+                    w, h = int(width), int(height)
+                    if 150 <= w <= 800 and 150 <= h <= 800:
+                        score += 3
+                except:
+                    pass
+
+            if score > 0:
+                scored_images.append((score, src))
+
+        if scored_images:
+            scored_images.sort(reverse=True, key=lambda x: x[0])
+            image_url = scored_images[0][1]
+
+    # Strategy 4: Fallback to og:image but with validation
+    if not image_url:
+        og_image = soup.find('meta', property='og:image')
+        if og_image and og_image.get('content'):
+            og_url = og_image['content']
+            # Only use og:image if it doesn't look like a generic asset
+            if not any(bad in og_url.lower() for bad in ['logo', 'banner', 'cover', 'default', 'og-image']):
+                image_url = og_url
+
+    # Ensure absolute URL
+    if image_url and not image_url.startswith('http'):
+        from urllib.parse import urljoin
+        image_url = urljoin(url, image_url)
+
+    return text, image_url
+
+_pools = {}
+_pools_pid = None
+_pools_lock = threading.Lock()
+
+def get_pool(stage):
+    """Return the process-wide thread pool for a stage in POOL_WORKERS, creating it on first use"""
+    global _pools, _pools_pid
+    with _pools_lock:
+        # A forked worker starts its own pools; the parent's threads don't exist there
+        if _pools_pid != os.getpid():
+            _pools, _pools_pid = {}, os.getpid()
+        pool = _pools.get(stage)
+        if pool is None:
+            pool = ThreadPoolExecutor(max_workers=POOL_WORKERS[stage], thread_name_prefix=stage)
+            _pools[stage] = pool
+    return pool
+
+def dedupe_urls(url_content_pairs):
+    """Skip duplicate URLs - fetching the same page twice never helps"""
+    pairs = []
+    seen_urls = set()
+    for url, tavily_content in url_content_pairs:
+        if url in seen_urls:
+            continue
+        seen_urls.add(url)
+        pairs.append((url, tavily_content))
+    return pairs
+
+def fetch_pages(url_content_pairs, name, deadline=FETCH_DEADLINE):
+    """
+    Fetch and parse search results concurrently.
+    Yields (url, tavily_content, text, image_url) in the original rank order.
+    Pages not finished by the deadline come back with empty text and image so
+    callers fall back to Tavily's content. Stopping iteration early cancels
+    any fetches that have not started yet.
+    """
+    pairs = dedupe_urls(url_content_pairs)
+    if not pairs:
+        return
 
-        return text, image_url
-    except Exception:
-        return '', ''
+    pool = get_pool('fetch')
+    futures = [pool.submit(extract_text_and_image, url, name) for url, _ in pairs]
+    try:
+        stop_at = time.monotonic() + deadline
+
+        for (url, tavily_content), future in zip(pairs, futures):
+            try:
+                text, img_url = future.result(timeout=max(stop_at - time.monotonic(), 0))
+            except Exception:
+                # Deadline passed (or the fetch blew up) - give up on this page
+                future.cancel()
+                text, img_url = '', ''
+            yield url, tavily_content, text, img_url
+    finally:
+        for future in futures:
+            future.cancel()
 
 def validate_headshot(image_url, name):
     """
-    Use OpenAI's vision API to validate if an image is actually a professional headshot
+    Use OpenAI's vision API to validate if an image is actually a professional headshot.
+    Verdicts are stored and reused for the same image URL, or (with Pillow
+    installed) for a resized or mirrored copy of an already judged image.
     Returns: (is_valid, confidence_score)
     """
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
+        return headshot_verdict(image_url, name)
+    except Exception as e:
+        # If validation fails, reject the image (fail closed for better quality),
+        # but don't remember that - the next lookup asks again
+        return False, 0
+
+def headshot_verdict(image_url, name):
+    """
+    validate_headshot without the fail-closed fallback: a stored verdict or a
+    fresh one from the model, raising if the model call or its answer fails.
+    """
+    url_key = image_key(image_url)
+    verdict = db.get_headshot_verdict(url_key, HEADSHOT_VERDICT_MODEL)
+    if verdict:
+        return verdict
+
+    hashes = fetch_image_hashes(image_url)
+    verdict = find_verdict_by_hash(url_key, hashes)
+    if verdict:
+        return verdict
+
+    verdict = request_headshot_verdict(image_url, name)
+    save_verdict(url_key, hashes, verdict)
+    return verdict
+
+def request_headshot_verdict(image_url, name):
+    """Ask the vision model about one image; raises if the call or its answer fails"""
+    rate_limit.acquire('openai')
+    response = client.chat.completions.create(
+        model=HEADSHOT_MODEL,
+        messages=headshot_messages(image_url, name),
+        max_tokens=300
+    )
+    return parse_headshot_response(response.choices[0].message.content)
+
+def fetch_image_hashes(image_url):
+    """Download an image and return image_probe.image_hashes for it (None without Pillow or on failure)"""
+    if image_probe.Image is None:
+        return None
+    try:
+        rate_limit.acquire('hosts', urlsplit(image_url).netloc.lower())
+        with http_client.get(image_url, headers={'User-Agent': PAGE_USER_AGENT}, stream=True) as r:
+            if not r.ok:
+                return None
+            body = read_capped(r, image_probe.IMAGE_HASH_MAX_BYTES + 1)
+    except Exception:
+        return None
+    if len(body) > image_probe.IMAGE_HASH_MAX_BYTES:
+        return None
+    return image_probe.image_hashes(body)
+
+def find_verdict_by_hash(url_key, hashes):
+    """Reuse the verdict of a near-identical (or mirrored) image, remembering it for url_key too"""
+    if not hashes:
+        return None
+    phash, mirrored = hashes
+    verdict = (db.find_headshot_verdict(phash, HEADSHOT_VERDICT_MODEL)
+               or db.find_headshot_verdict(mirrored, HEADSHOT_VERDICT_MODEL))
+    if verdict:
+        save_verdict(url_key, hashes, verdict)
+    return verdict
+
+def save_verdict(url_key, hashes, verdict):
+    is_valid, confidence = verdict
+    try:
+        confidence = int(confidence)
+    except (TypeError, ValueError):
+        return
+    db.save_headshot_verdict(url_key, hashes[0] if hashes else None, is_valid, confidence, HEADSHOT_VERDICT_MODEL)
+
+def headshot_messages(image_url, name):
+    """Chat messages asking the vision model to judge one image"""
+    return [
+        {
+            "role": "user",
+            "content": [
                 {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": f"""Analyze this image and determine if it is a REAL PHOTOGRAPH of a professional headshot or portrait of a person named {name}.
+                    "type": "text",
+                    "text": f"""Analyze this image and determine if it is a REAL PHOTOGRAPH of a professional headshot or portrait of a person named {name}.
 
 Answer with a JSON object:
 {{
@@ -204,37 +562,232 @@ REJECT if the image is:
 - A stock photo illustration or clipart
 
 Be very strict about rejecting illustrations and cartoons."""
-                        },
-                        {
-                            "type": "image_url",
-                            "image_url": {"url": image_url}
-                        }
-                    ]
+                },
+                {
+                    "type": "image_url",
+                    "image_url": {"url": image_url}
                 }
-            ],
-            max_tokens=300
-        )
-
-        import json
-        result_text = response.choices[0].message.content.strip()
-        # Try to extract JSON from markdown code blocks if present
-        if '```json' in result_text:
-            result_text = result_text.split('```json')[1].split('```')[0].strip()
-        elif '```' in result_text:
-            result_text = result_text.split('```')[1].split('```')[0].strip()
-
-        result = json.loads(result_text)
-        return result.get('is_headshot', False), result.get('confidence', 0)
-    except Exception as e:
-        # If validation fails, reject the image (fail closed for better quality)
-        return False, 0
+            ]
+        }
+    ]
+
+def parse_headshot_response(result_text):
+    """Turn the vision model's JSON answer into (is_valid, confidence)"""
+    import json
+    result_text = result_text.strip()
+    # Try to extract JSON from markdown code blocks if present
+    if '```json' in result_text:
+        result_text = result_text.split('```json')[1].split('```')[0].strip()
+    elif '```' in result_text:
+        result_text = result_text.split('```')[1].split('```')[0].strip()
+
+    result = json.loads(result_text)
+    return result.get('is_headshot', False), result.get('confidence', 0)
+
+def image_key(image_url):
+    """
+    Normalize an image URL so trivially different copies of the same image
+    (http/https, www, size/format/signature query params, fragments) compare equal
+    """
+    parts = urlsplit(image_url.strip())
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    query = sorted((k, v) for k, v in parse_qsl(parts.query) if k.lower() not in IMAGE_VARIANT_PARAMS)
+    return f"{host}{parts.path}?{urlencode(query)}"
+
+def dedupe_images(image_urls):
+    """Drop empty and near-identical image URLs, keeping the first occurrence"""
+    unique = []
+    seen = set()
+    for img_url in image_urls:
+        if not img_url:
+            continue
+        key = image_key(img_url)
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append(img_url)
+    return unique
+
+def image_probe_headers():
+    """Ask for just the start of the file; servers that ignore Range are cut off while streaming"""
+    return {'User-Agent': PAGE_USER_AGENT, 'Range': f'bytes=0-{image_probe.IMAGE_PROBE_BYTES - 1}'}
+
+def probe_image(image_url):
+    """Fetch the head of an image and return sniff_image's (format, width, height), or None if it can't be fetched"""
+    try:
+        rate_limit.acquire('hosts', urlsplit(image_url).netloc.lower())
+        with http_client.probe(image_url, headers=image_probe_headers(), stream=True,
+                               timeout=(http_client.PROBE_CONNECT_TIMEOUT, image_probe.IMAGE_PROBE_TIMEOUT)) as r:
+            if not r.ok:
+                return None
+            fmt = image_probe.content_type_format(r.headers.get('Content-Type'))
+            if fmt:
+                return fmt, None, None
+
+            data = bytearray()
+            sniffed = image_probe.sniff_image(data)
+            for chunk in r.iter_content(4096):
+                data += chunk
+                sniffed = image_probe.sniff_image(data)
+                if image_probe.sniff_finished(sniffed, data):
+                    break
+            return sniffed
+    except Exception:
+        return None
+
+def prefilter_images(image_urls):
+    """Probe candidate images concurrently; drop the ones that can't be headshots and rank the rest"""
+    if not image_urls:
+        return []
+    probes = list(get_pool('probe').map(probe_image, image_urls))
+    return image_probe.rank_images(image_urls, probes)
+
+def is_better_headshot(is_valid, confidence, rank, best_confidence, best_rank):
+    """Whether a validation result beats the current best; ties go to the earlier image"""
+    if not is_valid or confidence <= 0:
+        return False
+    return confidence > best_confidence or (confidence == best_confidence and rank < best_rank)
+
+def find_best_headshot(image_urls, name, stop_confidence=HEADSHOT_STOP_CONFIDENCE):
+    """
+    Validate candidate images concurrently and return (photo_url, confidence)
+    for the best valid headshot, or (None, 0).
+    Images are deduped and pre-filtered on their file headers first, so only
+    plausible headshots reach the vision model, likeliest first. Once any image
+    reaches stop_confidence the remaining checks are cancelled. Ties go to the
+    earlier image.
+    """
+    image_urls = prefilter_images(dedupe_images(image_urls))
+    if not image_urls:
+        return None, 0
+
+    photo_url, best_confidence, best_rank = None, 0, len(image_urls)
+    pool = get_pool('validate')
+    pending = {pool.submit(validate_headshot, img_url, name): (rank, img_url)
+               for rank, img_url in enumerate(image_urls)}
+    try:
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                rank, img_url = pending.pop(future)
+                is_valid, confidence = future.result()
+                print(f"Image: {img_url[:100]}... | Valid: {is_valid} | Confidence: {confidence}")
+
+                if is_better_headshot(is_valid, confidence, rank, best_confidence, best_rank):
+                    photo_url, best_confidence, best_rank = img_url, confidence, rank
+
+            # If we found a high-confidence match, stop searching
+            if best_confidence >= stop_confidence:
+                break
+    finally:
+        # Checks that haven't started yet are dropped; running ones finish in the background
+        for future in pending:
+            future.cancel()
+
+    return photo_url, best_confidence
+
+def summary_cache_key(name, company, texts, prompt='single'):
+    """
+    Cache key for a bio: who it is about, the whitespace-normalized source text,
+    which prompt wrote it ('single' for bio_prompt, 'batch' for batch_bio_prompt),
+    prompt version and model
+    """
+    return make_key(normalize_query(name or ''), normalize_query(company or ''),
+                    ' '.join((texts or '').split()), prompt, SUMMARY_PROMPT_VERSION, SUMMARY_MODEL)
+
+def batch_summary_cache_key(name, company, text):
+    """Cache key for a bio from batch_bio_prompt, which only sees the first BATCH_TEXT_CHARS of the text"""
+    return summary_cache_key(name, company, (text or '')[:BATCH_TEXT_CHARS], prompt='batch')
 
 def summarize_bio(name, company, texts):
     if not client:
-        # Return basic summary if OpenAI not available
-        return f"{name} is a professional at {company}. " + texts[:200] + "..."
+        return basic_bio(name, company, texts)
+
+    key = summary_cache_key(name, company, texts)
+    cached = summary_cache.get(key)
+    if cached is not None:
+        return cached
+
+    rate_limit.acquire('openai')
+    response = client.chat.completions.create(
+        model=SUMMARY_MODEL,
+        messages=[{"role": "user", "content": bio_prompt(name, company, texts)}]
+    )
+    bio = response.choices[0].message.content.strip()
+    summary_cache.set(key, bio)
+    return bio
+
+def summarize_bios_batch(jobs):
+    """
+    Summarize several profiles with one chat completion.
+    jobs is a list of (key, name, company, text); returns {key: bio}.
+    Profiles already in the summary cache are not sent; any profile the model
+    leaves out of its answer is summarized on its own, and one whose own request
+    fails too is left out of the result.
+    """
+    if not client:
+        return {key: basic_bio(name, company, text) for key, name, company, text in jobs}
+
+    import json
+    bios = {}
+    misses = []
+    for job in jobs:
+        key, name, company, text = job
+        cached = summary_cache.get(batch_summary_cache_key(name, company, text))
+        if cached is not None:
+            bios[key] = cached
+        else:
+            misses.append(job)
+
+    if misses:
+        try:
+            rate_limit.acquire('openai')
+            response = client.chat.completions.create(
+                model=SUMMARY_MODEL,
+                messages=[{"role": "user", "content": batch_bio_prompt(misses)}],
+                response_format={"type": "json_object"}
+            )
+            answer = json.loads(response.choices[0].message.content)
+            for i, (key, name, company, text) in enumerate(misses, 1):
+                bio = answer.get(str(i))
+                if isinstance(bio, str) and bio.strip():
+                    bios[key] = bio.strip()
+                    summary_cache.set(batch_summary_cache_key(name, company, text), bios[key])
+        except Exception as e:
+            print(f"Batch summary failed, falling back to single requests: {e}", flush=True)
+
+    for key, name, company, text in jobs:
+        if key not in bios:
+            try:
+                bios[key] = summarize_bio(name, company, text)
+            except Exception as e:
+                print(f"[{name}] ❌ Bio summary failed: {e}", flush=True)
+    return bios
+
+def batch_bio_prompt(jobs):
+    """One prompt covering many profiles, numbered so answers can be matched back"""
+    sections = []
+    for i, (_, name, company, text) in enumerate(jobs, 1):
+        sections.append(f"### Profile {i}\nName: {name}\nCompany: {company}\nWeb content:\n{text[:BATCH_TEXT_CHARS]}")
+    profiles = "\n\n".join(sections)
+    return f"""
+You are a helpful assistant. For each numbered profile below, write a professional bio of that person based on its web content.
+Focus on their roles, achievements, industries, and relevant history.
+Remove emojis and informal language. Each bio is a short paragraph in a LinkedIn-style tone.
+
+Answer with a JSON object mapping each profile number to its bio, e.g. {{"1": "...", "2": "..."}}.
+
+{profiles}
+"""
 
-    prompt = f"""
+def basic_bio(name, company, texts):
+    """Return basic summary if OpenAI not available"""
+    return f"{name} is a professional at {company}. " + texts[:200] + "..."
+
+def bio_prompt(name, company, texts):
+    return f"""
 You are a helpful assistant. Based on the following web content, write a professional bio for {name} from {company}.
 Focus on their roles, achievements, industries, and relevant history.
 Remove emojis and informal language. Output a short paragraph in a LinkedIn-style tone.
@@ -242,11 +795,6 @@ Remove emojis and informal language. Output a short paragraph in a LinkedIn-styl
 Web content:
 {texts}
 """
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}]
-    )
-    return response.choices[0].message.content.strip()
 
 def fallback_image(name):
     name_key = name.lower().replace(' ', '_')
@@ -306,13 +854,16 @@ def extract_company_from_text(text, url):
 
     return None  # Changed from "Unknown Company" to None
 
-def create_person_profile(name, url, tavily_content=''):
-    """Create a lightweight profile for a person from a URL"""
+def create_person_profile(name, url, tavily_content='', page=None):
+    """
+    Create a lightweight profile for a person from a URL.
+    page is an already fetched (text, image_url) pair; the URL is scraped if omitted.
+    """
     try:
         print(f"Creating profile for {name} from {url}", flush=True)
 
         # Try to scrape the page
-        text, img_url = extract_text_and_image(url, name)
+        text, img_url = page if page is not None else extract_text_and_image(url, name)
 
         # If scraping failed, use Tavily's content
         if (not text or len(text.strip()) < 20) and tavily_content:
@@ -385,18 +936,12 @@ def search_candidates():
         print(f"\nSearching for '{name}' with query: {query}", flush=True)
         print(f"Found {len(url_content_pairs)} URLs to process", flush=True)
 
-        # Create profiles for each candidate
+        # Create profiles for each candidate (pages are fetched concurrently)
         candidates = []
-        seen_urls = set()
         company_groups = {}  # Track companies to identify unique people
 
-        for url, tavily_content in url_content_pairs:
-            # Skip duplicate URLs
-            if url in seen_urls:
-                continue
-            seen_urls.add(url)
-
-            profile = create_person_profile(name, url, tavily_content)
+        for url, tavily_content, text, img_url in fetch_pages(url_content_pairs, name):
+            profile = create_person_profile(name, url, tavily_content, page=(text, img_url))
             if not profile:
                 continue
 
@@ -478,8 +1023,7 @@ def search_detail():
             url_content_pairs.insert(0, (source_url, ''))
 
         texts_images = []
-        for url, tavily_content in url_content_pairs[:10]:
-            text, img = extract_text_and_image(url, name)
+        for url, tavily_content, text, img in fetch_pages(url_content_pairs[:10], name):
             # Use Tavily content if scraping failed
             if not text or len(text.strip()) < 20:
                 text = tavily_content
@@ -498,21 +1042,8 @@ def search_detail():
         image_results = search_person_images_google(name, company)
         candidate_images.extend(image_results)
 
-        # Find the best validated headshot
-        photo_url = None
-        best_confidence = 0
-
-        for img_url in candidate_images:
-            if img_url:
-                is_valid, confidence = validate_headshot(img_url, name)
-                print(f"Image: {img_url[:100]}... | Valid: {is_valid} | Confidence: {confidence}")
-
-                if is_valid and confidence > best_confidence:
-                    photo_url = img_url
-                    best_confidence = confidence
-                    # If we found a high-confidence match, stop searching
-                    if confidence >= 85:
-                        break
+        # Find the best validated headshot (checked concurrently, deduped)
+        photo_url, best_confidence = find_best_headshot(candidate_images, name)
 
         # Fallback if no valid image found
         if not photo_url or best_confidence < 50:
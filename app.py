@@ -1,5 +1,5 @@
 from flask import Flask, render_template, request, jsonify
-import requests
+import http_client
 from bs4 import BeautifulSoup
 
 app = Flask(__name__)
@@ -15,13 +15,13 @@ def tavily_search(query):
         'include_domains': ['linkedin.com', 'crunchbase.com', 'company.com'],
         'max_results': 5
     }
-    response = requests.post(url, headers=headers, json=data)
+    response = http_client.post(url, headers=headers, json=data)
     response.raise_for_status()
     return response.json()['results']
 
 def extract_info_from_url(url):
     try:
-        resp = requests.get(url, timeout=10)
+        resp = http_client.get(url)
         soup = BeautifulSoup(resp.text, 'html.parser')
 
         bio = soup.find('meta', {'name': 'description'}) or soup.find('meta', {'property': 'og:description'})
@@ -0,0 +1,235 @@
+"""
+ASGI entry point for Social Book.
+/search, /save_profile and /search/detail run on the async discovery
+pipeline, so one process can serve dozens of in-flight lookups without a
+thread per request; their SQLite calls run in worker threads so they never
+stall the event loop. Every other route is handed to the Flask app.
+
+Run with: uvicorn asgi:app --host 0.0.0.0 --port 5001
+"""
+import asyncio
+import io
+import json
+import traceback
+from contextlib import aclosing
+
+from asgiref.wsgi import WsgiToAsgi
+from werkzeug.formparser import FormDataParser
+from werkzeug.http import parse_options_header
+
+import bio_worker
+import discovery
+import socialbook
+from ai_bio_scraper import fallback_image
+
+# Largest request body we will buffer (save_profile carries scraped page text)
+MAX_BODY_BYTES = 5 * 1024 * 1024
+
+flask_app = WsgiToAsgi(socialbook.app)
+
+class Request:
+    """Just enough of a request object for the discovery endpoints"""
+
+    def __init__(self, scope, body):
+        self.headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope.get('headers', [])}
+        self.body = body
+        self._form = None
+
+    @property
+    def form(self):
+        if self._form is None:
+            mimetype, options = parse_options_header(self.headers.get('content-type', ''))
+            _, self._form, _ = FormDataParser().parse(io.BytesIO(self.body), mimetype, len(self.body), options)
+        return self._form
+
+    @property
+    def json(self):
+        return json.loads(self.body or b'null')
+
+async def search(request):
+    """Async /search - check DB first, then web if not found"""
+    name = request.form.get('name', '').strip()
+    company = request.form.get('company', '').strip()
+
+    if not name:
+        return {'error': 'Name is required'}, 400
+
+    print(f"\n=== Searching for: {name} (company: {company or 'any'}) ===", flush=True)
+
+    force_web = request.form.get('force_web') == '1'
+    db_response = await asyncio.to_thread(socialbook.search_database, name, company, force_web)
+    if db_response:
+        return db_response, 200
+
+    print(f"Not found in DB, searching web...", flush=True)
+
+    try:
+        url_content_pairs = await discovery.tavily_search(socialbook.web_query(name, company))
+        print(f"Found {len(url_content_pairs)} web results", flush=True)
+
+        candidates = []
+        seen_companies = set()
+
+        async with aclosing(discovery.fetch_pages(url_content_pairs[:10], name)) as pages:
+            async for url, tavily_content, text, img_url in pages:
+                candidate = socialbook.candidate_from_page(name, url, tavily_content, text, img_url)
+                if not candidate or candidate['company'] in seen_companies:
+                    continue
+                seen_companies.add(candidate['company'])
+
+                candidates.append(candidate)
+                if len(candidates) >= socialbook.MAX_CANDIDATES:
+                    break
+
+        if not candidates:
+            return {'error': 'No profiles found on the web'}, 404
+
+        if len(candidates) == 1:
+            print(f"Only one candidate found, saving and queueing its bio...", flush=True)
+            return await asyncio.to_thread(socialbook.auto_saved_response, candidates[0]), 200
+
+        return {
+            'source': 'web',
+            'candidates': await asyncio.to_thread(socialbook.publish_candidates, candidates),
+            'count': len(candidates),
+            'found_in_db': False
+        }, 200
+
+    except Exception as e:
+        print(f"Error searching: {e}", flush=True)
+        print(traceback.format_exc(), flush=True)
+        return {'error': str(e)}, 500
+
+async def save_profile(request):
+    """Async /save_profile - save the candidate behind the token and queue its bio"""
+    try:
+        data = request.json or {}
+    except ValueError:
+        data = {}
+    candidate = await asyncio.to_thread(socialbook.resolve_candidate, data.get('token'))
+    if not candidate:
+        return {'error': 'This search result has expired, please search again'}, 410
+
+    print(f"Saving profile for {candidate['name']} at {candidate['company']}", flush=True)
+
+    try:
+        return await asyncio.to_thread(socialbook.saved_profile_response, candidate), 200
+    except Exception as e:
+        print(f"Error saving profile: {e}", flush=True)
+        print(traceback.format_exc(), flush=True)
+        return {'error': str(e)}, 500
+
+async def search_detail(request):
+    """Async /search/detail - detailed bio and validated headshot for one candidate"""
+    name = request.form.get('name', '').strip()
+    company = request.form.get('company', '').strip()
+    source_url = request.form.get('source_url', '').strip()
+
+    query = f"{name} {company} professional bio" if company else f"{name} professional bio"
+
+    # The dedicated image search doesn't depend on the page results, so start it now
+    image_search = asyncio.ensure_future(discovery.search_person_images(name, company))
+    try:
+        url_content_pairs = await discovery.tavily_search(query)
+        urls = [url for url, _ in url_content_pairs]
+
+        # If we have a source URL, prioritize it
+        if source_url and source_url not in urls:
+            urls.insert(0, source_url)
+            url_content_pairs.insert(0, (source_url, ''))
+
+        texts_images = []
+        async with aclosing(discovery.fetch_pages(url_content_pairs[:10], name)) as pages:
+            async for url, tavily_content, text, img in pages:
+                if not text or len(text.strip()) < 20:
+                    text = tavily_content
+                texts_images.append((text, img))
+        all_text = "\n\n".join([txt for txt, _ in texts_images])
+
+        candidate_images = [img_url for _, img_url in texts_images if img_url]
+        candidate_images.extend(await image_search)
+
+        # Photo validation and the bio summary are independent - run them together
+        (photo_url, best_confidence), summary = await asyncio.gather(
+            discovery.find_best_headshot(candidate_images, name),
+            discovery.summarize_bio(name, company, all_text)
+        )
+
+        if not photo_url or best_confidence < 50:
+            photo_url = fallback_image(name)
+            if not photo_url:
+                best_confidence = 0
+
+        return {
+            'name': name,
+            'company': company,
+            'bio': summary,
+            'photo_url': photo_url,
+            'source_urls': urls[:3],
+            'image_confidence': best_confidence
+        }, 200
+    except Exception as e:
+        print(f"Error getting search details: {e}", flush=True)
+        print(traceback.format_exc(), flush=True)
+        return {'error': str(e)}, 500
+    finally:
+        # Don't leave the image search running if the page results failed
+        if not image_search.done():
+            image_search.cancel()
+
+ROUTES = {
+    ('POST', '/search'): search,
+    ('POST', '/save_profile'): save_profile,
+    ('POST', '/search/detail'): search_detail,
+}
+
+async def read_body(receive):
+    body = bytearray()
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if len(body) > MAX_BODY_BYTES:
+            return None
+        if not message.get('more_body', False):
+            return bytes(body)
+
+async def send_json(send, payload, status):
+    body = socialbook.app.json.dumps(payload).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode('ascii')),
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            bio_worker.ensure_worker()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await discovery.aclose()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+
+    handler = ROUTES.get((scope.get('method'), scope.get('path'))) if scope['type'] == 'http' else None
+    if handler is None:
+        await flask_app(scope, receive, send)
+        return
+
+    body = await read_body(receive)
+    if body is None:
+        await send_json(send, {'error': 'Request body too large'}, 413)
+        return
+
+    payload, status = await handler(Request(scope, body))
+    await send_json(send, payload, status)
@@ -0,0 +1,99 @@
+"""
+Batched bio summarization for bulk imports.
+Import workers save profiles without a bio, together with a 'batched' bio job
+(see database.save_profiles_bulk), and submit them here; jobs are packed into
+multi-profile summary requests and each bio is written back to `profiles` as
+soon as its batch completes. Profiles that couldn't be summarized get a basic
+bio for now and their job is handed to bio_worker to retry. Batched jobs still
+on disk after a crash are re-submitted when the import resumes.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ai_bio_scraper import summarize_bios_batch, basic_bio
+import database as db
+
+DEFAULT_BATCH_SIZE = 10
+# Send a partial batch once its oldest job has waited this long
+DEFAULT_MAX_WAIT = 5.0
+
+_STOP = object()
+
+class BatchSummarizer:
+    """
+    Collects (profile_id, name, company, text) jobs and summarizes them in batches.
+    summarize_batch can be swapped for a local stand-in when testing; it takes
+    a list of (profile_id, name, company, text) and returns {profile_id: bio},
+    leaving out any profile it couldn't summarize.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, max_wait=DEFAULT_MAX_WAIT,
+                 concurrency=2, summarize_batch=summarize_bios_batch):
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.summarize_batch = summarize_batch
+        self.jobs = queue.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+        self.written = 0
+        self.batches = 0
+        self.lock = threading.Lock()
+        self.collector = threading.Thread(target=self._collect, daemon=True)
+        self.collector.start()
+
+    def submit(self, profile_id, name, company, text):
+        """Queue a profile for summarization (returns immediately)"""
+        self.jobs.put((profile_id, name, company, text))
+
+    def close(self):
+        """Send whatever is still queued and wait until every bio is written"""
+        self.jobs.put(_STOP)
+        self.collector.join()
+        self.executor.shutdown(wait=True)
+        print(f"📝 Wrote {self.written} bios in {self.batches} batches", flush=True)
+
+    def _collect(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if not batch else max(deadline - time.monotonic(), 0)
+            try:
+                job = self.jobs.get(timeout=timeout)
+            except queue.Empty:
+                job = None
+
+            if job is _STOP:
+                if batch:
+                    self.executor.submit(self._run, batch)
+                return
+
+            if job is not None:
+                if not batch:
+                    deadline = time.monotonic() + self.max_wait
+                batch.append(job)
+
+            if len(batch) >= self.batch_size or (batch and time.monotonic() >= deadline):
+                self.executor.submit(self._run, batch)
+                batch = []
+
+    def _run(self, batch):
+        try:
+            bios = self.summarize_batch(batch)
+        except Exception as e:
+            print(f"❌ Batch summary failed for {len(batch)} profiles: {e}", flush=True)
+            bios = {}
+
+        written = 0
+        for profile_id, name, company, text in batch:
+            if bios.get(profile_id):
+                db.complete_batched_bio(profile_id, bios[profile_id])
+                written += 1
+                print(f"[{name}] 📝 Bio written (ID: {profile_id})", flush=True)
+            else:
+                db.release_batched_bio(profile_id, basic_bio(name, company, text or ''))
+                print(f"[{name}] ⏳ Bio queued for retry (ID: {profile_id})", flush=True)
+
+        with self.lock:
+            self.written += written
+            self.batches += 1
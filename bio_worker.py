@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Background bio generation.
+/save_profile and the single-candidate auto-save in /search store the profile
+straight away and queue its bio in the bio_jobs table; a worker fills in
+profiles.bio and clients poll GET /bio_jobs/<id> until it is done.
+
+By default every web process runs one worker thread. To process the queue in a
+separate process instead, set BIO_WORKER=external and run: python bio_worker.py
+"""
+import os
+import threading
+import traceback
+
+import database as db
+from ai_bio_scraper import summarize_bio
+
+BIO_WORKER = os.getenv("BIO_WORKER", "thread")
+# Seconds an idle worker waits before checking the queue again (new jobs in
+# this process wake it immediately)
+POLL_INTERVAL = float(os.getenv("BIO_WORKER_POLL", "2"))
+MAX_ATTEMPTS = 3
+
+_wakeup = threading.Event()
+_worker = None
+_worker_pid = None
+_lock = threading.Lock()
+
+def enqueue(profile_id, name, company, text):
+    """Queue a bio for a saved profile; returns the job id to poll"""
+    job_id = db.enqueue_bio_job(profile_id, name, company, text)
+    ensure_worker()
+    _wakeup.set()
+    return job_id
+
+def ensure_worker():
+    """Start this process's worker thread unless it's running (or BIO_WORKER=external)"""
+    global _worker, _worker_pid
+    if BIO_WORKER != 'thread':
+        return
+    with _lock:
+        # A forked process (gunicorn worker) doesn't inherit the parent's thread
+        if _worker is not None and _worker_pid == os.getpid() and _worker.is_alive():
+            return
+        _worker = threading.Thread(target=run, name='bio-worker', daemon=True)
+        _worker_pid = os.getpid()
+        _worker.start()
+
+def process_one():
+    """Generate one queued bio; returns False if the queue was empty"""
+    job = db.claim_bio_job()
+    if not job:
+        return False
+
+    try:
+        bio = summarize_bio(job['name'], job['company'], job['text'] or '')
+    except Exception as e:
+        print(f"[{job['name']}] ❌ Bio generation failed (attempt {job['attempts']}): {e}", flush=True)
+        db.fail_bio_job(job['id'], str(e), MAX_ATTEMPTS)
+        return True
+
+    db.complete_bio_job(job['id'], bio)
+    print(f"[{job['name']}] 📝 Bio written (ID: {job['profile_id']})", flush=True)
+    return True
+
+def run():
+    """Process bio jobs forever"""
+    while True:
+        try:
+            busy = process_one()
+        except Exception as e:
+            print(f"Bio worker error: {e}", flush=True)
+            print(traceback.format_exc(), flush=True)
+            busy = False
+
+        if not busy:
+            _wakeup.wait(POLL_INTERVAL)
+            _wakeup.clear()
+
+if __name__ == '__main__':
+    print("📝 Bio worker started", flush=True)
+    run()
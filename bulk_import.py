@@ -2,37 +2,61 @@
 """
 Bulk import profiles into Social Book
 """
-import sys
+import argparse
+import csv
+import json
+import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from socialbook import (
     tavily_search, extract_text_and_image, extract_company_from_text,
-    summarize_bio
+    summarize_bio, search_person_images_google
 )
 import database as db
+import rate_limit
+from batch_summarize import BatchSummarizer, DEFAULT_BATCH_SIZE
 
-def import_person(name):
-    """Import a single person's profile"""
-    print(f"\n{'='*60}")
-    print(f"Importing: {name}")
-    print('='*60)
+# Concurrency and per-upstream rate limits (calls per minute) - replaces the old fixed 2s sleep
+DEFAULT_WORKERS = 4
+DEFAULT_TAVILY_RPM = 60
+DEFAULT_OPENAI_RPM = 120
+DEFAULT_HOST_RPM = 20
+
+# Found profiles are written SAVE_BATCH_SIZE per transaction, or after SAVE_MAX_WAIT seconds
+SAVE_BATCH_SIZE = 25
+SAVE_MAX_WAIT = 2.0
+
+def log(name, message):
+    """Print a progress line tagged with the person it belongs to (workers interleave)"""
+    print(f"[{name}] {message}", flush=True)
+
+def find_profile(name, company=None, summarizer=None):
+    """
+    Search the web for a person and build their profile without saving it.
+    Returns (profile, page_text), where profile holds save_profile's arguments,
+    or None if nothing usable was found. With a summarizer the bio is left empty.
+    """
+    log(name, "Importing...")
+    known_company = company
 
     try:
         # Search the web
-        query = f"{name} professional bio LinkedIn"
+        query = f"{name} {known_company} professional bio" if known_company else f"{name} professional bio LinkedIn"
         url_content_pairs = tavily_search(query)
 
         if not url_content_pairs:
-            print(f"  ❌ No results found for {name}")
-            return False
+            log(name, "❌ No results found")
+            return None
 
         # Also search for images specifically
-        print(f"  Searching for profile photo...")
-        image_results = search_person_images_google(name, None)
-        print(f"  Found {len(image_results)} potential images")
+        log(name, "Searching for profile photo...")
+        image_results = search_person_images_google(name, known_company)
+        log(name, f"Found {len(image_results)} potential images")
 
         # Try first few results
         for url, tavily_content in url_content_pairs[:5]:
-            print(f"  Trying: {url}")
+            log(name, f"Trying: {url}")
 
             text, img_url = extract_text_and_image(url, name)
 
@@ -41,16 +65,16 @@ def import_person(name):
                 text = tavily_content
 
             if not text or len(text.strip()) < 10:
-                print(f"    ⚠️  No text content")
+                log(name, "  ⚠️  No text content")
                 continue
 
             # If no image from scraping, try the image search results
             if not img_url and image_results:
                 img_url = image_results[0]  # Use first image result
-                print(f"    Using image search result")
+                log(name, "  Using image search result")
 
-            # Extract company
-            company = extract_company_from_text(text, url)
+            # Extract company (unless the input file told us)
+            company = known_company or extract_company_from_text(text, url)
             if not company:
                 from urllib.parse import urlparse
                 domain = urlparse(url).netloc
@@ -59,67 +83,337 @@ def import_person(name):
                 else:
                     company = "Company Not Listed"
 
-            print(f"    ✓ Company: {company}")
-            print(f"    ✓ Has photo: {bool(img_url)}")
+            log(name, f"  ✓ Company: {company}")
+            log(name, f"  ✓ Has photo: {bool(img_url)}")
 
-            # Generate bio
-            print(f"    Generating bio...")
-            bio = summarize_bio(name, company, text)
+            # Generate bio (or leave it to the batch summarizer)
+            if summarizer:
+                bio = None
+            else:
+                log(name, "  Generating bio...")
+                bio = summarize_bio(name, company, text)
 
             # Create snippet
             snippet = text[:200].strip()
             if len(text) > 200:
                 snippet += "..."
 
-            # Save to database
-            profile_id = db.save_profile(
-                name=name,
-                company=company,
-                bio=bio,
-                photo_url=img_url,
-                snippet=snippet,
-                source_urls=[url],
-                image_confidence=0
-            )
-
-            print(f"  ✅ Successfully imported {name} (ID: {profile_id})")
-            return True
-
-        print(f"  ❌ Could not extract valid data for {name}")
-        return False
+            profile = {
+                'name': name,
+                'company': company,
+                'bio': bio,
+                'photo_url': img_url,
+                'snippet': snippet,
+                'source_urls': [url],
+                'image_confidence': 0
+            }
+            return profile, text
+
+        log(name, "❌ Could not extract valid data")
+        return None
 
     except Exception as e:
-        print(f"  ❌ Error importing {name}: {e}")
+        log(name, f"❌ Error importing: {e}")
         import traceback
         traceback.print_exc()
-        return False
+        return None
+
+class ProfileSaver:
+    """
+    Buffers profiles found by the workers and writes them with db.save_profiles_bulk,
+    one transaction per batch. on_saved receives [(tag, profile_id), ...] after each
+    batch is written. Only the thread driving the import uses it.
+    """
+
+    def __init__(self, on_saved, summarizer=None, batch_size=SAVE_BATCH_SIZE, max_wait=SAVE_MAX_WAIT):
+        self.on_saved = on_saved
+        self.summarizer = summarizer
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.pending = []
+        self.oldest = None
+
+    def add(self, profile, text, tag):
+        if not self.pending:
+            self.oldest = time.monotonic()
+        self.pending.append((profile, text, tag))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush_if_due(self):
+        if self.pending and time.monotonic() - self.oldest >= self.max_wait:
+            self.flush()
 
-def bulk_import(names):
-    """Import multiple people"""
-    print(f"\n🚀 Starting bulk import of {len(names)} profiles\n")
+    def flush(self):
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
 
-    success_count = 0
-    fail_count = 0
+        # With a summarizer the pending bios are written in the same transaction,
+        # so they survive a crash once on_saved has moved the checkpoint past them
+        bio_texts = [text for _, text, _ in batch] if self.summarizer else None
+        ids = db.save_profiles_bulk([profile for profile, _, _ in batch], bio_texts=bio_texts)
+        for (profile, text, _), profile_id in zip(batch, ids):
+            log(profile['name'], f"✅ Successfully imported (ID: {profile_id})")
+            if self.summarizer:
+                self.summarizer.submit(profile_id, profile['name'], profile['company'], text)
+        self.on_saved([(tag, profile_id) for (_, _, tag), profile_id in zip(batch, ids)])
 
-    for i, name in enumerate(names, 1):
-        print(f"\n[{i}/{len(names)}] ", end='')
+class ImportProgress:
+    """Thread-safe success/failure counters with throughput and ETA reporting"""
 
-        if import_person(name):
-            success_count += 1
-        else:
-            fail_count += 1
+    def __init__(self, total):
+        self.total = total
+        self.success = 0
+        self.failed = 0
+        self.skipped = 0
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
 
-        # Be polite to APIs - add delay
-        if i < len(names):
-            time.sleep(2)
+    def record(self, name, ok):
+        with self.lock:
+            if ok:
+                self.success += 1
+            else:
+                self.failed += 1
+            self._report(name, '✓' if ok else '✗')
 
+    def skip(self, name):
+        """Count a record that needed no work (already imported); doesn't affect throughput"""
+        with self.lock:
+            self.skipped += 1
+            self._report(name, '↷')
+
+    def _report(self, name, mark):
+        done = self.success + self.failed
+        elapsed = time.monotonic() - self.started
+        per_minute = done / elapsed * 60 if elapsed else 0.0
+        remaining = (self.total - done - self.skipped) / per_minute if per_minute else 0.0
+        print(f"[{done + self.skipped}/{self.total}] {mark} {name} | {per_minute:.1f} names/min | "
+              f"ETA {remaining:.1f} min | ok {self.success}, failed {self.failed}, skipped {self.skipped}", flush=True)
+
+def configure_rate_limits(tavily_rpm=DEFAULT_TAVILY_RPM, openai_rpm=DEFAULT_OPENAI_RPM, host_rpm=DEFAULT_HOST_RPM):
+    """Per-upstream token buckets; every scraped host gets its own host_rpm bucket"""
+    rate_limit.configure('tavily', tavily_rpm)
+    rate_limit.configure('openai', openai_rpm)
+    rate_limit.configure('hosts', host_rpm)
+
+def bulk_import(names, workers=DEFAULT_WORKERS, summarizer=None):
+    """Import multiple people concurrently, throttled by the configured rate limits"""
+    print(f"\n🚀 Starting bulk import of {len(names)} profiles with {workers} workers\n")
+
+    progress = ImportProgress(len(names))
+
+    def saved(batch):
+        for name, _ in batch:
+            progress.record(name, True)
+
+    saver = ProfileSaver(saved, summarizer)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(find_profile, name, None, summarizer): name for name in names}
+            pending = set(futures)
+            while pending:
+                done_futures, pending = wait(pending, timeout=saver.max_wait, return_when=FIRST_COMPLETED)
+                for future in done_futures:
+                    name = futures[future]
+                    found = future.result()
+                    if found:
+                        saver.add(*found, tag=name)
+                    else:
+                        progress.record(name, False)
+                saver.flush_if_due()
+        saver.flush()
+    finally:
+        if summarizer:
+            summarizer.close()
+
+    print_summary(progress)
+
+def print_summary(progress):
+    elapsed = time.monotonic() - progress.started
     print(f"\n{'='*60}")
     print(f"✅ Import complete!")
-    print(f"   Success: {success_count}")
-    print(f"   Failed: {fail_count}")
+    print(f"   Success: {progress.success}")
+    print(f"   Failed: {progress.failed}")
+    print(f"   Skipped: {progress.skipped}")
+    print(f"   Elapsed: {elapsed:.1f}s")
     print(f"   Total in DB: {db.get_profile_count()}")
     print('='*60)
 
+def read_people(path):
+    """
+    Stream (name, company) records from a CSV or JSONL file without loading it whole.
+    CSV files may have a header with 'name' and optional 'company' columns;
+    otherwise the first two columns are used. JSONL lines are objects with the same keys.
+    """
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        if path.lower().endswith(('.jsonl', '.ndjson')):
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                name = (record.get('name') or '').strip()
+                if name:
+                    yield name, (record.get('company') or '').strip() or None
+            return
+
+        reader = csv.reader(f)
+        name_col, company_col = 0, 1
+        for i, row in enumerate(reader):
+            if i == 0:
+                header = [col.strip().lower() for col in row]
+                if 'name' in header:
+                    name_col = header.index('name')
+                    company_col = header.index('company') if 'company' in header else None
+                    continue
+            name = row[name_col].strip() if len(row) > name_col else ''
+            company = row[company_col].strip() if company_col is not None and len(row) > company_col else ''
+            if name:
+                yield name, company or None
+
+def import_file(path, workers=DEFAULT_WORKERS, restart=False, batch_size=0, rates=None):
+    """
+    Import every person in a CSV/JSONL file, recording per-record status in socialbook.db.
+    Re-running the same file resumes after the last checkpoint; records already
+    finished (or whose profile already exists) are skipped.
+    workers, batch_size (--batch-summaries) and rates (configure_rate_limits'
+    arguments) are saved with the job so --resume carries on the same way.
+    Returns False if another process is already importing the file.
+    """
+    source = os.path.abspath(path)
+    lock = db.claim_import_job(source)
+    if lock is None:
+        print(f"⚠️  {source} is already being imported by another process")
+        return False
+
+    try:
+        rates = rates or {}
+        configure_rate_limits(**rates)
+        options = {'workers': workers, 'batch_summaries': batch_size, **rates}
+        job = db.get_or_create_import_job(source, restart=restart, options=options)
+        job_id, checkpoint = job['id'], job['checkpoint']
+        statuses = db.get_import_item_statuses(job_id, after_line=checkpoint)
+
+        total = sum(1 for _ in read_people(source))
+        print(f"\n🚀 Importing {source} ({total} records, resuming after #{checkpoint}) with {workers} workers\n")
+        progress = ImportProgress(total - checkpoint)
+
+        # Bios a previous run saved for batching but never wrote
+        leftover = db.get_batched_bio_jobs(job_id)
+        summarizer = None
+        if batch_size or leftover:
+            summarizer = BatchSummarizer(batch_size=batch_size or DEFAULT_BATCH_SIZE)
+            for profile_id, name, company, text in leftover:
+                summarizer.submit(profile_id, name, company, text)
+        try:
+            checkpoint = run_file_import(source, job_id, checkpoint, statuses, workers, summarizer, progress)
+        finally:
+            if summarizer:
+                summarizer.close()
+        # Only complete once every batched bio is written, so resume can finish them
+        db.update_import_job(job_id, checkpoint, status='complete')
+        print_summary(progress)
+    finally:
+        lock.close()
+    return True
+
+def run_file_import(source, job_id, checkpoint, statuses, workers, summarizer, progress):
+    """
+    Feed records past the checkpoint to a worker pool, advancing the checkpoint
+    as they finish. Returns the final checkpoint.
+    """
+    # Records finished out of order; the checkpoint only advances over a contiguous prefix
+    finished = set()
+    in_flight = {}
+    window = workers * 4  # bounded so huge files never pile up queued work
+
+    def finish(line_no, save=True):
+        """Mark a record finished; returns whether the checkpoint moved"""
+        nonlocal checkpoint
+        finished.add(line_no)
+        if checkpoint + 1 not in finished:
+            return False
+        while checkpoint + 1 in finished:
+            checkpoint += 1
+            finished.discard(checkpoint)
+        if save:
+            db.update_import_job(job_id, checkpoint)
+        return True
+
+    def saved(batch):
+        db.record_import_items(job_id, [
+            (line_no, name, company, 'done', profile_id) for (line_no, name, company), profile_id in batch
+        ])
+        moved = False
+        for (line_no, name, _), _ in batch:
+            progress.record(name, True)
+            moved = finish(line_no, save=False) or moved
+        if moved:
+            db.update_import_job(job_id, checkpoint)
+
+    saver = ProfileSaver(saved, summarizer)
+
+    def collect(done_futures):
+        for future in done_futures:
+            line_no, name, company = in_flight.pop(future)
+            try:
+                found, error = future.result(), None
+            except Exception as e:
+                found, error = None, str(e)
+            if found:
+                saver.add(*found, tag=(line_no, name, company))
+                continue
+            db.record_import_item(job_id, line_no, name, company, 'failed', None, error)
+            progress.record(name, False)
+            finish(line_no)
+        saver.flush_if_due()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for line_no, (name, company) in enumerate(read_people(source), 1):
+            if line_no <= checkpoint:
+                continue
+
+            if statuses.get(line_no) in ('done', 'skipped', 'failed'):
+                progress.skip(name)
+                finish(line_no)
+                continue
+
+            if db.profile_exists(name, company):
+                db.record_import_item(job_id, line_no, name, company, 'skipped')
+                progress.skip(name)
+                finish(line_no)
+                continue
+
+            while len(in_flight) >= window:
+                done_futures, _ = wait(in_flight, timeout=saver.max_wait, return_when=FIRST_COMPLETED)
+                collect(done_futures)
+
+            db.record_import_item(job_id, line_no, name, company, 'running')
+            in_flight[executor.submit(find_profile, name, company, summarizer)] = (line_no, name, company)
+
+        while in_flight:
+            done_futures, _ = wait(in_flight, timeout=saver.max_wait, return_when=FIRST_COMPLETED)
+            collect(done_futures)
+
+    saver.flush()
+    return checkpoint
+
+def resume_unfinished(workers=DEFAULT_WORKERS, batch_size=0, rates=None):
+    """
+    Resume every file import that was interrupted (e.g. by a deploy restart)
+    with the options it was started with. The arguments only apply to jobs
+    saved before options were recorded. Jobs another process is running are left to it.
+    """
+    for job in db.get_unfinished_import_jobs():
+        if not os.path.exists(job['source']):
+            print(f"⚠️  Can't resume import of {job['source']}: file is gone")
+            continue
+        options = dict(job['options'])
+        job_workers = options.pop('workers', workers)
+        job_batch_size = options.pop('batch_summaries', batch_size)
+        import_file(job['source'], workers=job_workers, batch_size=job_batch_size, rates=options or rates)
+
 if __name__ == '__main__':
     # List of names to import
     names = [
@@ -134,8 +428,31 @@ if __name__ == '__main__':
         "Avner Stepak"
     ]
 
+    parser = argparse.ArgumentParser(description="Bulk import profiles into Social Book")
+    parser.add_argument('names', nargs='*', help="names to import (defaults to the built-in list)")
+    parser.add_argument('--file', help="CSV or JSONL file of names (and optional companies); resumable")
+    parser.add_argument('--restart', action='store_true', help="with --file, ignore any saved progress")
+    parser.add_argument('--resume', action='store_true',
+                        help="resume all interrupted file imports with the options each was started with")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="people imported concurrently")
+    parser.add_argument('--batch-summaries', type=int, metavar='N', default=0,
+                        help="summarize bios N profiles per request instead of one at a time")
+    parser.add_argument('--tavily-rpm', type=float, default=DEFAULT_TAVILY_RPM, help="Tavily calls per minute")
+    parser.add_argument('--openai-rpm', type=float, default=DEFAULT_OPENAI_RPM, help="OpenAI calls per minute")
+    parser.add_argument('--host-rpm', type=float, default=DEFAULT_HOST_RPM, help="page fetches per minute to any one host")
+    args = parser.parse_args()
+
     # If names provided as arguments, use those instead
-    if len(sys.argv) > 1:
-        names = sys.argv[1:]
+    if args.names:
+        names = args.names
 
-    bulk_import(names)
+    rates = {'tavily_rpm': args.tavily_rpm, 'openai_rpm': args.openai_rpm, 'host_rpm': args.host_rpm}
+    if args.resume:
+        resume_unfinished(workers=args.workers, batch_size=args.batch_summaries, rates=rates)
+    elif args.file:
+        import_file(args.file, workers=args.workers, restart=args.restart, batch_size=args.batch_summaries,
+                    rates=rates)
+    else:
+        configure_rate_limits(**rates)
+        summarizer = BatchSummarizer(batch_size=args.batch_summaries) if args.batch_summaries else None
+        bulk_import(names, workers=args.workers, summarizer=summarizer)
@@ -0,0 +1,254 @@
+"""
+SQLite-backed key/value cache with TTL expiry and LRU eviction.
+Lives in its own database file next to socialbook.db so it can be
+deleted at any time without touching profile data.
+
+Reads don't write: access times (for LRU) and hit/miss counts are kept in
+memory and written in one transaction every CACHE_FLUSH_INTERVAL seconds,
+before evicting, and at exit.
+"""
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import database as db
+
+CACHE_DB_PATH = os.path.join(os.path.dirname(db.DB_PATH), 'cache.db')
+
+# Longest a read's access time and hit/miss count stay only in memory
+CACHE_FLUSH_INTERVAL = float(os.getenv('CACHE_FLUSH_INTERVAL', '10'))
+
+def init_cache_db(path=CACHE_DB_PATH):
+    """Create the cache tables if they don't exist"""
+    conn = db.get_connection(path)
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS cache_entries (
+            namespace TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            stored_at REAL NOT NULL,
+            accessed_at REAL NOT NULL,
+            PRIMARY KEY (namespace, key)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_cache_lru ON cache_entries(namespace, accessed_at)
+    ''')
+
+    # Hit/miss counters live in the database so every worker process reports the same numbers
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS cache_stats (
+            namespace TEXT PRIMARY KEY,
+            hits INTEGER NOT NULL DEFAULT 0,
+            misses INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+
+    conn.commit()
+    cursor.close()
+
+def make_key(*parts):
+    """Build a stable cache key from any JSON-serializable parts"""
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+class SQLiteCache:
+    """
+    A namespaced cache of JSON values with a TTL, bounded by entry count and/or bytes.
+    Entries older than ttl are stale; they are kept until max_age so callers
+    can revalidate them (see lookup/refresh) instead of refetching from scratch.
+    """
+
+    def __init__(self, namespace, ttl, max_entries=None, max_bytes=None, max_age=None, path=CACHE_DB_PATH):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max(max_age or ttl, ttl)
+        self.path = path
+        self._lock = threading.Lock()
+        self._accessed = {}  # key -> last read time not yet written
+        self._hits = 0
+        self._misses = 0
+        self._flushed_at = time.monotonic()
+        init_cache_db(path)
+        atexit.register(self.flush)
+
+    def _connect(self):
+        return db.get_connection(self.path)
+
+    def _record(self, key, now, hit):
+        """Buffer a read; returns True once the buffer is due to be flushed"""
+        with self._lock:
+            if key is not None:
+                self._accessed[key] = now
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+            return time.monotonic() - self._flushed_at >= CACHE_FLUSH_INTERVAL
+
+    def _take_pending(self):
+        with self._lock:
+            pending = self._accessed, self._hits, self._misses
+            self._accessed, self._hits, self._misses = {}, 0, 0
+            self._flushed_at = time.monotonic()
+        return pending
+
+    def _restore_pending(self, pending):
+        accessed, hits, misses = pending
+        with self._lock:
+            for key, accessed_at in accessed.items():
+                self._accessed[key] = max(accessed_at, self._accessed.get(key, 0))
+            self._hits += hits
+            self._misses += misses
+
+    def _write_pending(self, cursor, pending):
+        accessed, hits, misses = pending
+        if accessed:
+            cursor.executemany('''
+                UPDATE cache_entries SET accessed_at = MAX(accessed_at, ?)
+                WHERE namespace = ? AND key = ?
+            ''', [(accessed_at, self.namespace, key) for key, accessed_at in accessed.items()])
+        if hits or misses:
+            cursor.execute('''
+                INSERT INTO cache_stats (namespace, hits, misses) VALUES (?, ?, ?)
+                ON CONFLICT(namespace) DO UPDATE SET hits = hits + excluded.hits, misses = misses + excluded.misses
+            ''', (self.namespace, hits, misses))
+
+    def flush(self):
+        """Write the buffered access times and hit/miss counts"""
+        pending = self._take_pending()
+        if not any(pending):
+            return
+        try:
+            conn = self._connect()
+            with conn:
+                self._write_pending(conn.cursor(), pending)
+        except sqlite3.Error as e:
+            print(f"Cache write failed ({self.namespace}): {e}", flush=True)
+            self._restore_pending(pending)
+
+    def get(self, key):
+        """Return the cached value for key, or None if missing or expired"""
+        value, fresh = self.lookup(key)
+        return value if fresh else None
+
+    def lookup(self, key):
+        """
+        Return (value, fresh) for key. A stale entry still returns its value with
+        fresh=False so the caller can revalidate it; a missing one returns (None, False).
+        Only fresh entries count as hits.
+        """
+        now = time.time()
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT value, stored_at FROM cache_entries
+                WHERE namespace = ? AND key = ? AND stored_at > ?
+            ''', (self.namespace, key, now - self.max_age))
+            row = cursor.fetchone()
+            cursor.close()
+        except sqlite3.Error as e:
+            # A broken cache must never break a search
+            print(f"Cache read failed ({self.namespace}): {e}", flush=True)
+            return None, False
+
+        fresh = bool(row) and row[1] > now - self.ttl
+        if self._record(key if row else None, now, hit=fresh):
+            self.flush()
+        return (json.loads(row[0]) if row else None), fresh
+
+    def refresh(self, key):
+        """Mark a revalidated entry as fresh again without rewriting its value"""
+        now = time.time()
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute('''
+                    UPDATE cache_entries SET stored_at = ?, accessed_at = ?
+                    WHERE namespace = ? AND key = ?
+                ''', (now, now, self.namespace, key))
+        except sqlite3.Error as e:
+            print(f"Cache write failed ({self.namespace}): {e}", flush=True)
+
+    def set(self, key, value):
+        """Store value under key, then evict expired and least recently used entries"""
+        now = time.time()
+        payload = json.dumps(value, ensure_ascii=False)
+        pending = self._take_pending()
+        try:
+            conn = self._connect()
+            with conn:
+                cursor = conn.cursor()
+                # Buffered reads first, so eviction sees current access times
+                self._write_pending(cursor, pending)
+                cursor.execute('''
+                    INSERT INTO cache_entries (namespace, key, value, size, stored_at, accessed_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(namespace, key) DO UPDATE SET
+                        value = excluded.value,
+                        size = excluded.size,
+                        stored_at = excluded.stored_at,
+                        accessed_at = excluded.accessed_at
+                ''', (self.namespace, key, payload, len(payload.encode('utf-8')), now, now))
+
+                cursor.execute('''
+                    DELETE FROM cache_entries WHERE namespace = ? AND stored_at <= ?
+                ''', (self.namespace, now - self.max_age))
+
+                if self.max_entries:
+                    cursor.execute('''
+                        DELETE FROM cache_entries WHERE namespace = ? AND key IN (
+                            SELECT key FROM cache_entries WHERE namespace = ?
+                            ORDER BY accessed_at DESC
+                            LIMIT -1 OFFSET ?
+                        )
+                    ''', (self.namespace, self.namespace, self.max_entries))
+
+                if self.max_bytes:
+                    # Keep the most recently used entries that fit in the byte budget
+                    cursor.execute('''
+                        DELETE FROM cache_entries WHERE namespace = ? AND key IN (
+                            SELECT key FROM (
+                                SELECT key, SUM(size) OVER (
+                                    ORDER BY accessed_at DESC ROWS UNBOUNDED PRECEDING
+                                ) AS running_size
+                                FROM cache_entries WHERE namespace = ?
+                            ) WHERE running_size > ?
+                        )
+                    ''', (self.namespace, self.namespace, self.max_bytes))
+        except sqlite3.Error as e:
+            print(f"Cache write failed ({self.namespace}): {e}", flush=True)
+            self._restore_pending(pending)
+
+    def stats(self):
+        """Hit/miss counters and current size of this namespace"""
+        self.flush()
+        conn = self._connect()
+        with conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT hits, misses FROM cache_stats WHERE namespace = ?', (self.namespace,))
+            hits, misses = cursor.fetchone() or (0, 0)
+            cursor.execute('''
+                SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?
+            ''', (self.namespace,))
+            entries, size = cursor.fetchone()
+
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / lookups, 3) if lookups else 0.0,
+            'entries': entries,
+            'bytes': size
+        }
@@ -1,12 +1,98 @@
+import atexit
+import fcntl
+import hashlib
+import os
+import re
 import sqlite3
+import threading
+import time
+from collections import Counter
 from datetime import datetime
+from difflib import SequenceMatcher
 import json
 
 DB_PATH = 'socialbook.db'
 
+# Seconds a writer waits for another process's write lock before giving up
+BUSY_TIMEOUT = 10
+# Prepared statements kept per connection (sqlite3's default is 128)
+STATEMENT_CACHE_SIZE = 256
+
+# Applied to every new connection. WAL lets readers run while a bulk import
+# is writing; synchronous=NORMAL is durable under WAL except on power loss.
+PRAGMAS = [
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA temp_store = MEMORY',
+    f"PRAGMA mmap_size = {int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))}",
+    f"PRAGMA cache_size = -{int(os.getenv('SQLITE_CACHE_KB', '20000'))}",
+]
+
+# Column weights for bm25() ranking: name, company, bio, snippet
+FTS_WEIGHTS = (10.0, 5.0, 1.0, 2.0)
+
+# Fuzzy name lookup: how many trigram matches to re-score, and the
+# minimum similarity (0-1) for a name to count as a likely typo
+FUZZY_CANDIDATES = 50
+FUZZY_MIN_SIMILARITY = 0.8
+
+# Columns selected for each result view: 'card' is what the browse grid and
+# result lists render, 'full' is the whole profile for the detail view
+PROFILE_VIEWS = {
+    'card': 'p.id, p.name, p.company, p.snippet, p.photo_url, p.created_at',
+    'full': 'p.*',
+}
+
+# Triggers maintaining the FTS indexes, dropped during large bulk saves
+SEARCH_TRIGGERS = (
+    'profiles_ai', 'profiles_au', 'profiles_ad',
+    'profiles_trigram_ai', 'profiles_trigram_au', 'profiles_trigram_ad',
+)
+# Bulk saves at least this large (and at least half the table) skip per-row
+# FTS maintenance and rebuild the indexes once at the end instead
+BULK_REBUILD_MIN_ROWS = 1000
+
+# Perceptual hashes of images whose headshot verdicts can be shared: 64 bits,
+# matched within PHASH_MAX_DISTANCE differing bits (must stay below PHASH_BANDS)
+PHASH_BANDS = 4
+PHASH_MAX_DISTANCE = 3
+PHASH_MASK = (1 << 64) - 1
+
+# Verdict reuse counts are buffered in memory and written in one transaction
+# at most this often (seconds), so reading a stored verdict never writes
+VERDICT_HITS_FLUSH_INTERVAL = float(os.getenv('VERDICT_HITS_FLUSH_INTERVAL', '30'))
+
+_local = threading.local()
+
+_verdict_hits = Counter()
+_verdict_hits_lock = threading.Lock()
+_verdict_hits_flushed = time.monotonic()
+
+def get_connection(path=DB_PATH):
+    """
+    Return this thread's connection to path, opening it on first use.
+    Connections are reused for the life of the thread so prepared statements
+    and the page cache survive between calls; a forked worker (gunicorn
+    preload) opens its own instead of sharing the parent's.
+    Rows come back as sqlite3.Row. Wrap writes in `with conn:` so they are
+    committed, or rolled back on error, before the connection is reused.
+    """
+    if getattr(_local, 'pid', None) != os.getpid():
+        _local.connections = {}
+        _local.pid = os.getpid()
+
+    conn = _local.connections.get(path)
+    if conn is None:
+        conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, cached_statements=STATEMENT_CACHE_SIZE)
+        conn.row_factory = sqlite3.Row
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        _local.connections[path] = conn
+    return conn
+
 def init_db():
     """Initialize the database with schema"""
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_connection()
     cursor = conn.cursor()
 
     cursor.execute('''
@@ -33,13 +119,273 @@ def init_db():
         CREATE INDEX IF NOT EXISTS idx_company ON profiles(company)
     ''')
 
+    # Case-insensitive exact-name and name-prefix lookups
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_name_nocase ON profiles(name COLLATE NOCASE)
+    ''')
+
+    # Browse order (newest first); id breaks ties between rows saved in the same second
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_created ON profiles(created_at, id)
+    ''')
+
+    # prefix= indexes 2- and 3-character prefixes so as-you-type queries ("jo*")
+    # don't scan the whole term list. FTS tables created without it are
+    # recreated here and rebuilt from profiles below.
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'profiles_fts'")
+    row = cursor.fetchone()
+    recreate_fts = bool(row) and 'prefix' not in row[0]
+    if recreate_fts:
+        cursor.execute('DROP TABLE profiles_fts')
+
     cursor.execute('''
         CREATE VIRTUAL TABLE IF NOT EXISTS profiles_fts USING fts5(
-            name, company, bio, snippet, content=profiles, content_rowid=id
+            name, company, bio, snippet, content=profiles, content_rowid=id, prefix='2 3'
+        )
+    ''')
+
+    # Older databases updated/deleted profiles_fts rows directly, which corrupts an
+    # external-content FTS index once a profile changes. Swap in the 'delete'
+    # command triggers below and rebuild the index from profiles once.
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'profiles_au'")
+    row = cursor.fetchone()
+    rebuild_fts = bool(row) and 'UPDATE profiles_fts' in row[0]
+    if rebuild_fts:
+        cursor.execute('DROP TRIGGER profiles_au')
+        cursor.execute('DROP TRIGGER IF EXISTS profiles_ad')
+    elif row and 'UPDATE OF' not in row[0]:
+        # profiles_au used to re-index on every update, even photo-only ones
+        cursor.execute('DROP TRIGGER profiles_au')
+
+    # Trigram index over names for typo-tolerant lookups (FTS5 trigram
+    # tokenizer, SQLite 3.34+). Without it find_similar_names returns nothing.
+    try:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE profiles_trigram USING fts5(
+                name, content=profiles, content_rowid=id, tokenize='trigram'
+            )
+        ''')
+        cursor.execute("INSERT INTO profiles_trigram(profiles_trigram) VALUES ('rebuild')")
+    except sqlite3.OperationalError as e:
+        if 'already exists' not in str(e):
+            print(f"Fuzzy name search unavailable: {e}")
+
+    # Triggers to keep the FTS indexes updated
+    create_search_triggers(cursor)
+
+    if rebuild_fts or recreate_fts:
+        cursor.execute("INSERT INTO profiles_fts(profiles_fts) VALUES ('rebuild')")
+
+    # Profile counters kept up to date by triggers, so /stats and /browse
+    # never have to COUNT(*) the profiles table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS profile_stats (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+
+    # Profiles per company ('' for profiles without one)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS company_stats (
+            company TEXT PRIMARY KEY,
+            count INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_company_stats_count ON company_stats(count)
+    ''')
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS profiles_stats_ai AFTER INSERT ON profiles BEGIN
+            UPDATE profile_stats SET value = value + 1 WHERE key = 'total';
+            UPDATE profile_stats SET value = value + 1
+                WHERE key = 'with_photo' AND COALESCE(new.photo_url, '') != '';
+            INSERT INTO company_stats (company, count) VALUES (COALESCE(new.company, ''), 1)
+                ON CONFLICT(company) DO UPDATE SET count = count + 1;
+        END
+    ''')
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS profiles_stats_ad AFTER DELETE ON profiles BEGIN
+            UPDATE profile_stats SET value = value - 1 WHERE key = 'total';
+            UPDATE profile_stats SET value = value - 1
+                WHERE key = 'with_photo' AND COALESCE(old.photo_url, '') != '';
+            UPDATE company_stats SET count = count - 1 WHERE company = COALESCE(old.company, '');
+            DELETE FROM company_stats WHERE company = COALESCE(old.company, '') AND count <= 0;
+        END
+    ''')
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS profiles_stats_au_photo AFTER UPDATE OF photo_url ON profiles
+        WHEN (COALESCE(old.photo_url, '') != '') != (COALESCE(new.photo_url, '') != '') BEGIN
+            UPDATE profile_stats SET value = value + (CASE WHEN COALESCE(new.photo_url, '') != '' THEN 1 ELSE -1 END)
+                WHERE key = 'with_photo';
+        END
+    ''')
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS profiles_stats_au_company AFTER UPDATE OF company ON profiles
+        WHEN COALESCE(old.company, '') != COALESCE(new.company, '') BEGIN
+            UPDATE company_stats SET count = count - 1 WHERE company = COALESCE(old.company, '');
+            DELETE FROM company_stats WHERE company = COALESCE(old.company, '') AND count <= 0;
+            INSERT INTO company_stats (company, count) VALUES (COALESCE(new.company, ''), 1)
+                ON CONFLICT(company) DO UPDATE SET count = count + 1;
+        END
+    ''')
+
+    # First run on an existing database: seed the counters from the table once
+    cursor.execute("SELECT 1 FROM profile_stats WHERE key = 'total'")
+    if cursor.fetchone() is None:
+        rebuild_profile_stats(cursor)
+
+    # Bulk import jobs: one row per input file, with per-record status so an
+    # interrupted import can resume from its checkpoint
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS import_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source TEXT NOT NULL UNIQUE,
+            checkpoint INTEGER DEFAULT 0,
+            status TEXT DEFAULT 'running',
+            options TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Jobs from before options (workers, batch size, rate limits) were saved
+    cursor.execute('PRAGMA table_info(import_jobs)')
+    if 'options' not in [row['name'] for row in cursor.fetchall()]:
+        cursor.execute('ALTER TABLE import_jobs ADD COLUMN options TEXT')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS import_items (
+            job_id INTEGER NOT NULL,
+            line_no INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            company TEXT,
+            status TEXT NOT NULL,
+            profile_id INTEGER,
+            error TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (job_id, line_no)
+        )
+    ''')
+
+    # Bios waiting to be generated for saved profiles (see bio_worker.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS bio_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            profile_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            company TEXT,
+            text TEXT,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_bio_jobs_status ON bio_jobs(status, id)
+    ''')
+
+    # Progress of resumable maintenance jobs (validate_photos.py): every
+    # profile with an id up to checkpoint has been handled in this pass
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS backfill_jobs (
+            name TEXT PRIMARY KEY,
+            checkpoint INTEGER DEFAULT 0,
+            status TEXT DEFAULT 'running',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Vision-model headshot verdicts, reused for the same image URL or for a
+    # copy of the image whose perceptual hash is within a few bits. The hash is
+    # also stored as four 16-bit bands: two hashes within 3 bits of each other
+    # always share at least one band, so candidates come from an index lookup.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS headshot_verdicts (
+            url_key TEXT PRIMARY KEY,
+            phash INTEGER,
+            band0 INTEGER,
+            band1 INTEGER,
+            band2 INTEGER,
+            band3 INTEGER,
+            is_headshot INTEGER NOT NULL,
+            confidence INTEGER NOT NULL,
+            model TEXT NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    for band in range(PHASH_BANDS):
+        cursor.execute(f'''
+            CREATE INDEX IF NOT EXISTS idx_headshot_band{band} ON headshot_verdicts(band{band})
+        ''')
+
+    # Verdict counters kept up to date by triggers, like profile_stats.
+    # 'reused' only grows: replacing a verdict resets its hits but not the total.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS verdict_stats (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
         )
     ''')
 
-    # Trigger to keep FTS index updated
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS headshot_verdicts_stats_ai AFTER INSERT ON headshot_verdicts BEGIN
+            UPDATE verdict_stats SET value = value + 1 WHERE key = 'verdicts';
+            UPDATE verdict_stats SET value = value + 1 WHERE key = 'hashed' AND new.phash IS NOT NULL;
+            UPDATE verdict_stats SET value = value + new.hits WHERE key = 'reused';
+        END
+    ''')
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS headshot_verdicts_stats_ad AFTER DELETE ON headshot_verdicts BEGIN
+            UPDATE verdict_stats SET value = value - 1 WHERE key = 'verdicts';
+            UPDATE verdict_stats SET value = value - 1 WHERE key = 'hashed' AND old.phash IS NOT NULL;
+        END
+    ''')
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS headshot_verdicts_stats_au_phash AFTER UPDATE OF phash ON headshot_verdicts
+        WHEN (old.phash IS NULL) != (new.phash IS NULL) BEGIN
+            UPDATE verdict_stats SET value = value + (CASE WHEN new.phash IS NOT NULL THEN 1 ELSE -1 END)
+                WHERE key = 'hashed';
+        END
+    ''')
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS headshot_verdicts_stats_au_hits AFTER UPDATE OF hits ON headshot_verdicts
+        WHEN new.hits > old.hits BEGIN
+            UPDATE verdict_stats SET value = value + new.hits - old.hits WHERE key = 'reused';
+        END
+    ''')
+
+    # First run on an existing database: seed the counters from the table once
+    cursor.execute("SELECT 1 FROM verdict_stats WHERE key = 'verdicts'")
+    if cursor.fetchone() is None:
+        cursor.execute('''
+            INSERT INTO verdict_stats (key, value)
+            SELECT 'verdicts', COUNT(*) FROM headshot_verdicts
+            UNION ALL
+            SELECT 'hashed', COUNT(phash) FROM headshot_verdicts
+            UNION ALL
+            SELECT 'reused', COALESCE(SUM(hits), 0) FROM headshot_verdicts
+        ''')
+
+    conn.commit()
+    cursor.close()
+
+def create_search_triggers(cursor):
+    """Create the triggers that keep profiles_fts (and profiles_trigram) in sync with profiles"""
     cursor.execute('''
         CREATE TRIGGER IF NOT EXISTS profiles_ai AFTER INSERT ON profiles BEGIN
             INSERT INTO profiles_fts(rowid, name, company, bio, snippet)
@@ -48,139 +394,829 @@ def init_db():
     ''')
 
     cursor.execute('''
-        CREATE TRIGGER IF NOT EXISTS profiles_au AFTER UPDATE ON profiles BEGIN
-            UPDATE profiles_fts SET name=new.name, company=new.company,
-                bio=new.bio, snippet=new.snippet WHERE rowid=new.id;
+        CREATE TRIGGER IF NOT EXISTS profiles_au AFTER UPDATE OF name, company, bio, snippet ON profiles BEGIN
+            INSERT INTO profiles_fts(profiles_fts, rowid, name, company, bio, snippet)
+            VALUES ('delete', old.id, old.name, old.company, old.bio, old.snippet);
+            INSERT INTO profiles_fts(rowid, name, company, bio, snippet)
+            VALUES (new.id, new.name, new.company, new.bio, new.snippet);
         END
     ''')
 
     cursor.execute('''
         CREATE TRIGGER IF NOT EXISTS profiles_ad AFTER DELETE ON profiles BEGIN
-            DELETE FROM profiles_fts WHERE rowid=old.id;
+            INSERT INTO profiles_fts(profiles_fts, rowid, name, company, bio, snippet)
+            VALUES ('delete', old.id, old.name, old.company, old.bio, old.snippet);
         END
     ''')
 
-    conn.commit()
-    conn.close()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'profiles_trigram'")
+    if cursor.fetchone():
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS profiles_trigram_ai AFTER INSERT ON profiles BEGIN
+                INSERT INTO profiles_trigram(rowid, name) VALUES (new.id, new.name);
+            END
+        ''')
 
-def search_profiles(query):
-    """Search profiles in database using full-text search"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS profiles_trigram_au AFTER UPDATE OF name ON profiles BEGIN
+                INSERT INTO profiles_trigram(profiles_trigram, rowid, name) VALUES ('delete', old.id, old.name);
+                INSERT INTO profiles_trigram(rowid, name) VALUES (new.id, new.name);
+            END
+        ''')
+
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS profiles_trigram_ad AFTER DELETE ON profiles BEGIN
+                INSERT INTO profiles_trigram(profiles_trigram, rowid, name) VALUES ('delete', old.id, old.name);
+            END
+        ''')
+
+def drop_search_triggers(cursor):
+    """Drop the search index triggers (save_profiles_bulk rebuilds the indexes instead)"""
+    for trigger in SEARCH_TRIGGERS:
+        cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+
+def rebuild_search_indexes(cursor):
+    """Rebuild profiles_fts (and profiles_trigram) from the profiles table"""
+    cursor.execute("INSERT INTO profiles_fts(profiles_fts) VALUES ('rebuild')")
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'profiles_trigram'")
+    if cursor.fetchone():
+        cursor.execute("INSERT INTO profiles_trigram(profiles_trigram) VALUES ('rebuild')")
+
+def decode_source_urls(profile):
+    """Parse a profile's source_urls JSON in place (card views don't select it)"""
+    if profile.get('source_urls'):
+        try:
+            profile['source_urls'] = json.loads(profile['source_urls'])
+        except:
+            profile['source_urls'] = []
+    return profile
 
-    # Full-text search
+def rebuild_profile_stats(cursor):
+    """Recount profile_stats and company_stats from the profiles table"""
+    cursor.execute('DELETE FROM profile_stats')
+    cursor.execute('DELETE FROM company_stats')
     cursor.execute('''
-        SELECT p.* FROM profiles p
-        JOIN profiles_fts ON p.id = profiles_fts.rowid
-        WHERE profiles_fts MATCH ?
-        ORDER BY rank
-        LIMIT 20
-    ''', (query,))
+        INSERT INTO profile_stats (key, value)
+        SELECT 'total', COUNT(*) FROM profiles
+        UNION ALL
+        SELECT 'with_photo', COUNT(*) FROM profiles WHERE COALESCE(photo_url, '') != ''
+    ''')
+    cursor.execute('''
+        INSERT INTO company_stats (company, count)
+        SELECT COALESCE(company, ''), COUNT(*) FROM profiles GROUP BY COALESCE(company, '')
+    ''')
 
-    results = [dict(row) for row in cursor.fetchall()]
+def compile_fts_query(query, prefix=True, column=None):
+    """
+    Turn free text into a safe FTS5 MATCH expression, or None if it has no words.
+    Every word is quoted, so punctuation (O'Brien, AT&T) and FTS keywords (AND,
+    NEAR) are plain text; all words must match, and with prefix the last one
+    also matches as a prefix ("jo" finds "John"). column restricts the match
+    to one FTS column (name, company, bio or snippet).
+    """
+    words = re.findall(r'\w+', query or '')
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    if prefix:
+        terms[-1] += '*'
+    expression = ' '.join(terms)
+    return f'{column} : ({expression})' if column else expression
+
+def search_profiles(query=None, name=None, company=None, has_photo=None, min_confidence=None, limit=20, view='full'):
+    """
+    Search profiles in database using full-text search.
+    query matches any column; name and company only match their own column.
+    has_photo (True/False) and min_confidence filter the matches in the same query.
+    Results are ranked with bm25(), weighting name matches above company, snippet and bio;
+    with only has_photo/min_confidence given, the newest profiles come first.
+    view picks the columns returned (see PROFILE_VIEWS).
+    """
+    columns = PROFILE_VIEWS[view]
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    filters = []
+    params = []
+    if has_photo is not None:
+        filters.append("COALESCE(p.photo_url, '') != ''" if has_photo else "COALESCE(p.photo_url, '') = ''")
+    if min_confidence is not None:
+        filters.append('p.image_confidence >= ?')
+        params.append(min_confidence)
+    where = ''.join(f' AND {f}' for f in filters)
+
+    match = ' AND '.join(filter(None, [
+        compile_fts_query(query),
+        compile_fts_query(name, column='name'),
+        compile_fts_query(company, column='company'),
+    ]))
+
+    results = []
+    if match:
+        cursor.execute(f'''
+            SELECT {columns} FROM profiles_fts
+            JOIN profiles p ON p.id = profiles_fts.rowid
+            WHERE profiles_fts MATCH ?{where}
+            ORDER BY bm25(profiles_fts, ?, ?, ?, ?)
+            LIMIT ?
+        ''', (match, *params, *FTS_WEIGHTS, limit))
+        results = [dict(row) for row in cursor.fetchall()]
+    elif not any(text and text.strip() for text in (query, name, company)):
+        cursor.execute(f'''
+            SELECT {columns} FROM profiles p
+            WHERE 1 = 1{where}
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+        ''', (*params, limit))
+        results = [dict(row) for row in cursor.fetchall()]
+
+    # If no FTS results for a free-text query, try a name prefix (uses idx_name_nocase)
+    if not results and query and query.strip() and not (name or company):
+        escaped = query.strip().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        cursor.execute(f'''
+            SELECT {columns} FROM profiles p
+            WHERE name LIKE ? ESCAPE '\\'{where}
+            ORDER BY name COLLATE NOCASE
+            LIMIT ?
+        ''', (escaped + '%', *params, limit))
+        results = [dict(row) for row in cursor.fetchall()]
+
+    cursor.close()
+
+    # Parse source_urls from JSON
+    for result in results:
+        decode_source_urls(result)
+
+    return results
+
+def name_similarity(a, b):
+    """How alike two names are, from 0 to 1, ignoring case and extra whitespace"""
+    a = ' '.join(a.lower().split())
+    b = ' '.join(b.lower().split())
+    return SequenceMatcher(None, a, b).ratio()
+
+def find_similar_names(name, company=None, limit=5, min_similarity=FUZZY_MIN_SIMILARITY):
+    """
+    Profiles whose name is probably a misspelling of name ("Avner Stepek" finds
+    "Avner Stepak"), best first, each with a 'similarity' score.
+    Rows sharing the most trigrams with name are fetched from profiles_trigram,
+    then re-scored with name_similarity. company narrows the results like
+    find_profiles_by_name does.
+    """
+    normalized = ' '.join((name or '').lower().split())
+    trigrams = {normalized[i:i + 3] for i in range(len(normalized) - 2)}
+    if not trigrams:
+        return []
+    match = ' OR '.join('"' + trigram.replace('"', '""') + '"' for trigram in sorted(trigrams))
+
+    company_filter = ' AND instr(lower(p.company), lower(?)) > 0' if company else ''
+    params = (match, company, FUZZY_CANDIDATES) if company else (match, FUZZY_CANDIDATES)
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f'''
+            SELECT p.* FROM profiles_trigram
+            JOIN profiles p ON p.id = profiles_trigram.rowid
+            WHERE profiles_trigram MATCH ?{company_filter}
+            ORDER BY bm25(profiles_trigram)
+            LIMIT ?
+        ''', params)
+        rows = [dict(row) for row in cursor.fetchall()]
+    except sqlite3.OperationalError:
+        # No trigram index on this SQLite build
+        rows = []
+    cursor.close()
+
+    results = []
+    for row in rows:
+        row['similarity'] = round(name_similarity(name, row['name']), 3)
+        if row['similarity'] >= min_similarity:
+            results.append(row)
+    results.sort(key=lambda row: row['similarity'], reverse=True)
+    results = results[:limit]
+
+    # Parse source_urls from JSON
+    for result in results:
+        decode_source_urls(result)
+
+    return results
+
+def find_profiles_by_name(name, company=None, limit=20):
+    """
+    Profiles whose name is exactly name, ignoring case (uses idx_name_nocase).
+    If company is given, only profiles whose company contains it (also ignoring case).
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
 
-    # If no FTS results, try LIKE search
-    if not results:
+    if company:
         cursor.execute('''
             SELECT * FROM profiles
-            WHERE name LIKE ? OR company LIKE ?
-            ORDER BY created_at DESC
-            LIMIT 20
-        ''', (f'%{query}%', f'%{query}%'))
-        results = [dict(row) for row in cursor.fetchall()]
+            WHERE name = ? COLLATE NOCASE AND instr(lower(company), lower(?)) > 0
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+        ''', (name, company, limit))
+    else:
+        cursor.execute('''
+            SELECT * FROM profiles
+            WHERE name = ? COLLATE NOCASE
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+        ''', (name, limit))
 
-    conn.close()
+    results = [dict(row) for row in cursor.fetchall()]
+    cursor.close()
 
     # Parse source_urls from JSON
     for result in results:
-        if result.get('source_urls'):
-            try:
-                result['source_urls'] = json.loads(result['source_urls'])
-            except:
-                result['source_urls'] = []
+        decode_source_urls(result)
 
     return results
 
-def get_all_profiles(limit=50, offset=0):
-    """Get all profiles for browsing"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+def get_all_profiles(limit=50, offset=0, after=None, view='full'):
+    """
+    Get all profiles for browsing, newest first.
+    after=(created_at, id) of the last profile already shown continues from there
+    using the index (keyset pagination); offset still works but walks every skipped row.
+    view picks the columns returned (see PROFILE_VIEWS).
+    """
+    columns = PROFILE_VIEWS[view]
+    conn = get_connection()
     cursor = conn.cursor()
 
-    cursor.execute('''
-        SELECT * FROM profiles
-        ORDER BY created_at DESC
-        LIMIT ? OFFSET ?
-    ''', (limit, offset))
+    if after:
+        cursor.execute(f'''
+            SELECT {columns} FROM profiles p
+            WHERE (created_at, id) < (?, ?)
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+        ''', (after[0], after[1], limit))
+    else:
+        cursor.execute(f'''
+            SELECT {columns} FROM profiles p
+            ORDER BY created_at DESC, id DESC
+            LIMIT ? OFFSET ?
+        ''', (limit, offset))
 
     results = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    cursor.close()
 
     # Parse source_urls from JSON
     for result in results:
-        if result.get('source_urls'):
-            try:
-                result['source_urls'] = json.loads(result['source_urls'])
-            except:
-                result['source_urls'] = []
+        decode_source_urls(result)
 
     return results
 
 def get_profile_count():
-    """Get total number of profiles"""
-    conn = sqlite3.connect(DB_PATH)
+    """Get total number of profiles (from the trigger-maintained counter)"""
+    conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute('SELECT COUNT(*) FROM profiles')
-    count = cursor.fetchone()[0]
-    conn.close()
-    return count
+    cursor.execute("SELECT value FROM profile_stats WHERE key = 'total'")
+    row = cursor.fetchone()
+    cursor.close()
+    return row[0] if row else 0
 
-def save_profile(name, company, bio, photo_url, snippet, source_urls, image_confidence=0):
-    """Save or update a profile"""
-    conn = sqlite3.connect(DB_PATH)
+def get_profile_stats(top_companies=10):
+    """Profile totals, photo coverage and the companies with the most profiles"""
+    conn = get_connection()
     cursor = conn.cursor()
 
-    # Convert source_urls list to JSON
-    source_urls_json = json.dumps(source_urls) if isinstance(source_urls, list) else json.dumps([])
+    cursor.execute('SELECT key, value FROM profile_stats')
+    counts = {row['key']: row['value'] for row in cursor.fetchall()}
 
     cursor.execute('''
-        INSERT INTO profiles (name, company, bio, photo_url, snippet, source_urls, image_confidence)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(name, company) DO UPDATE SET
-            bio = excluded.bio,
-            photo_url = excluded.photo_url,
-            snippet = excluded.snippet,
-            source_urls = excluded.source_urls,
-            image_confidence = excluded.image_confidence,
-            updated_at = CURRENT_TIMESTAMP
-    ''', (name, company, bio, photo_url, snippet, source_urls_json, image_confidence))
+        SELECT company, count FROM company_stats
+        WHERE company != ''
+        ORDER BY count DESC
+        LIMIT ?
+    ''', (top_companies,))
+    companies = [dict(row) for row in cursor.fetchall()]
+    cursor.close()
 
-    profile_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
+    total = counts.get('total', 0)
+    with_photo = counts.get('with_photo', 0)
+    return {
+        'total': total,
+        'with_photo': with_photo,
+        'without_photo': total - with_photo,
+        'top_companies': companies
+    }
+
+def save_profile(name, company, bio, photo_url, snippet, source_urls, image_confidence=0):
+    """Save or update a profile"""
+    conn = get_connection()
+    with conn:
+        cursor = conn.cursor()
+
+        # Convert source_urls list to JSON
+        source_urls_json = json.dumps(source_urls) if isinstance(source_urls, list) else json.dumps([])
+
+        # RETURNING gives the right id for updates too (lastrowid doesn't on upsert)
+        cursor.execute('''
+            INSERT INTO profiles (name, company, bio, photo_url, snippet, source_urls, image_confidence)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(name, company) DO UPDATE SET
+                bio = COALESCE(excluded.bio, profiles.bio),
+                photo_url = excluded.photo_url,
+                snippet = excluded.snippet,
+                source_urls = excluded.source_urls,
+                image_confidence = excluded.image_confidence,
+                updated_at = CURRENT_TIMESTAMP
+            RETURNING id
+        ''', (name, company, bio, photo_url, snippet, source_urls_json, image_confidence))
+
+        profile_id = cursor.fetchone()[0]
 
     return profile_id
 
+def save_profiles_bulk(profiles, rebuild_fts=None, bio_texts=None):
+    """
+    Save or update many profiles in one transaction; returns their ids in order.
+    Each profile is a dict with save_profile's arguments (missing ones default to None/0).
+    rebuild_fts drops the search triggers, writes the rows, then rebuilds the FTS
+    indexes once; by default it is used for batches of BULK_REBUILD_MIN_ROWS or
+    more that are also at least half the size of the table.
+    bio_texts, if given, holds each profile's page text: a 'batched' bio job is
+    queued for every profile in the same transaction, so a bio left to a
+    BatchSummarizer is still on disk if the process dies before writing it.
+    """
+    if not profiles:
+        return []
+
+    rows = [(
+        profile['name'],
+        profile.get('company'),
+        profile.get('bio'),
+        profile.get('photo_url'),
+        profile.get('snippet'),
+        json.dumps(profile['source_urls']) if isinstance(profile.get('source_urls'), list) else json.dumps([]),
+        profile.get('image_confidence') or 0
+    ) for profile in profiles]
+
+    conn = get_connection()
+    with conn:
+        cursor = conn.cursor()
+
+        if rebuild_fts is None:
+            total = get_profile_count()
+            rebuild_fts = len(rows) >= BULK_REBUILD_MIN_ROWS and len(rows) * 2 >= total
+
+        if rebuild_fts:
+            drop_search_triggers(cursor)
+
+        cursor.executemany('''
+            INSERT INTO profiles (name, company, bio, photo_url, snippet, source_urls, image_confidence)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(name, company) DO UPDATE SET
+                bio = COALESCE(excluded.bio, profiles.bio),
+                photo_url = excluded.photo_url,
+                snippet = excluded.snippet,
+                source_urls = excluded.source_urls,
+                image_confidence = excluded.image_confidence,
+                updated_at = CURRENT_TIMESTAMP
+        ''', rows)
+
+        if rebuild_fts:
+            rebuild_search_indexes(cursor)
+            create_search_triggers(cursor)
+
+        # executemany discards RETURNING rows, so look the ids up (newest wins for
+        # profiles without a company, which the UNIQUE constraint doesn't dedupe)
+        ids = []
+        for row in rows:
+            cursor.execute('''
+                SELECT id FROM profiles WHERE name = ? AND company IS ? ORDER BY id DESC LIMIT 1
+            ''', (row[0], row[1]))
+            ids.append(cursor.fetchone()[0])
+
+        if bio_texts is not None:
+            cursor.executemany('''
+                INSERT INTO bio_jobs (profile_id, name, company, text, status) VALUES (?, ?, ?, ?, 'batched')
+            ''', [(profile_id, row[0], row[1], text) for profile_id, row, text in zip(ids, rows, bio_texts)])
+
+    return ids
+
+def update_profile_bio(profile_id, bio):
+    """Fill in the bio of an already saved profile"""
+    conn = get_connection()
+    with conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE profiles SET bio = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?
+        ''', (bio, profile_id))
+
 def get_profile_by_id(profile_id):
     """Get a specific profile by ID"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+    conn = get_connection()
     cursor = conn.cursor()
 
     cursor.execute('SELECT * FROM profiles WHERE id = ?', (profile_id,))
     row = cursor.fetchone()
-    conn.close()
+    cursor.close()
 
     if row:
-        result = dict(row)
-        if result.get('source_urls'):
-            try:
-                result['source_urls'] = json.loads(result['source_urls'])
-            except:
-                result['source_urls'] = []
-        return result
+        return decode_source_urls(dict(row))
     return None
 
+def profile_exists(name, company=None):
+    """Whether a profile with this name (and company, if given) is already saved"""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    if company:
+        cursor.execute('''
+            SELECT 1 FROM profiles WHERE name = ? COLLATE NOCASE AND company = ? COLLATE NOCASE LIMIT 1
+        ''', (name, company))
+    else:
+        cursor.execute('SELECT 1 FROM profiles WHERE name = ? COLLATE NOCASE LIMIT 1', (name,))
+    exists = cursor.fetchone() is not None
+    cursor.close()
+    return exists
+
+def get_or_create_import_job(source, restart=False, options=None):
+    """
+    Return the import job for a source file, creating it (or resetting it if
+    restart). options, if given, replace the settings saved for resuming it.
+    """
+    conn = get_connection()
+    with conn:
+        cursor = conn.cursor()
+
+        if restart:
+            cursor.execute('''
+                DELETE FROM import_items WHERE job_id IN (SELECT id FROM import_jobs WHERE source = ?)
+            ''', (source,))
+            cursor.execute('DELETE FROM import_jobs WHERE source = ?', (source,))
+
+        cursor.execute('INSERT OR IGNORE INTO import_jobs (source) VALUES (?)', (source,))
+        cursor.execute('''
+            UPDATE import_jobs SET status = 'running', updated_at = CURRENT_TIMESTAMP WHERE source = ?
+        ''', (source,))
+        if options is not None:
+            cursor.execute('UPDATE import_jobs SET options = ? WHERE source = ?', (json.dumps(options), source))
+        cursor.execute('SELECT * FROM import_jobs WHERE source = ?', (source,))
+        job = import_job_to_dict(cursor.fetchone())
+    return job
+
+def get_unfinished_import_jobs():
+    """Import jobs that were interrupted before finishing"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM import_jobs WHERE status = 'running' ORDER BY id")
+    jobs = [import_job_to_dict(row) for row in cursor.fetchall()]
+    cursor.close()
+    return jobs
+
+def import_job_to_dict(row):
+    job = dict(row)
+    job['options'] = json.loads(job['options']) if job['options'] else {}
+    return job
+
+def claim_import_job(source):
+    """
+    Take an exclusive lock on the import of a source file so only one process
+    runs it. Returns the open lock file (keep it open while importing), or
+    None if another process holds it. The lock goes away with its process,
+    even a killed one, so a restarted deploy can resume straight away.
+    """
+    digest = hashlib.sha1(source.encode('utf-8')).hexdigest()[:16]
+    lock_file = open(f"{DB_PATH}.import-{digest}.lock", 'a')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        return None
+    return lock_file
+
+def get_import_item_statuses(job_id, after_line=0):
+    """Map line_no -> status for a job's records past its checkpoint"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT line_no, status FROM import_items WHERE job_id = ? AND line_no > ?
+    ''', (job_id, after_line))
+    statuses = {row['line_no']: row['status'] for row in cursor.fetchall()}
+    cursor.close()
+    return statuses
+
+def record_import_item(job_id, line_no, name, company, status, profile_id=None, error=None):
+    """Record the status of one input record (pending, running, done, skipped or failed)"""
+    conn = get_connection()
+    with conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO import_items (job_id, line_no, name, company, status, profile_id, error)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(job_id, line_no) DO UPDATE SET
+                status = excluded.status,
+                profile_id = excluded.profile_id,
+                error = excluded.error,
+                updated_at = CURRENT_TIMESTAMP
+        ''', (job_id, line_no, name, company, status, profile_id, error))
+
+def record_import_items(job_id, items):
+    """Record many (line_no, name, company, status, profile_id) results in one transaction"""
+    conn = get_connection()
+    with conn:
+        cursor = conn.cursor()
+        cursor.executemany('''
+            INSERT INTO import_items (job_id, line_no, name, company, status, profile_id)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(job_id, line_no) DO UPDATE SET
+                status = excluded.status,
+                profile_id = excluded.profile_id,
+                error = NULL,
+                updated_at = CURRENT_TIMESTAMP
+        ''', [(job_id, *item) for item in items])
+
+def update_import_job(job_id, checkpoint, status='running'):
+    """Advance a job's checkpoint (every record up to it is finished)"""
+    conn = get_connection()
+    with conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE import_jobs SET checkpoint = ?, status = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (checkpoint, status, job_id))
+
+def get_or_create_backfill_job(name, restart=False):
+    """Return a backfill job, starting a new pass if it finished last time (or restart)"""
+    conn = get_connection()
+    with conn:
+        cursor = conn.cursor()
+        cursor.execute('INSERT OR IGNORE INTO backfill_jobs (name) VALUES (?)', (name,))
+        cursor.execute('''
+            UPDATE backfill_jobs SET
+                checkpoint = CASE WHEN ? OR status = 'complete' THEN 0 ELSE checkpoint END,
+                status = 'running',
+                updated_at = CURRENT_TIMESTAMP
+            WHERE name = ?
+        ''', (restart, name))
+        cursor.execute('SELECT * FROM backfill_jobs WHERE name = ?', (name,))
+        job = dict(cursor.fetchone())
+    return job
+
+def update_backfill_job(name, checkpoint, status='running'):
+    """Advance a backfill job's checkpoint"""
+    conn = get_connection()
+    with conn:
+        conn.execute('''
+            UPDATE backfill_jobs SET checkpoint = ?, status = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE name = ?
+        ''', (checkpoint, status, name))
+
+def get_photos_to_validate(after_id, min_confidence, limit):
+    """Profiles past after_id whose photo is unvalidated or below min_confidence, in id order"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT id, name, company, photo_url, image_confidence FROM profiles
+        WHERE id > ? AND COALESCE(photo_url, '') != '' AND COALESCE(image_confidence, 0) < ?
+        ORDER BY id LIMIT ?
+    ''', (after_id, min_confidence, limit))
+    profiles = [dict(row) for row in cursor.fetchall()]
+    cursor.close()
+    return profiles
+
+def update_profile_photos(updates, job_name, checkpoint):
+    """
+    Write many (profile_id, checked_url, photo_url, image_confidence) results
+    and advance the backfill job's checkpoint in the same transaction. A
+    profile whose photo changed since checked_url was read keeps its new photo.
+    """
+    conn = get_connection()
+    with conn:
+        cursor = conn.cursor()
+        cursor.executemany('''
+            UPDATE profiles SET photo_url = ?, image_confidence = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ? AND photo_url = ?
+        ''', [(photo_url, confidence, profile_id, checked_url)
+              for profile_id, checked_url, photo_url, confidence in updates])
+        cursor.execute('''
+            UPDATE backfill_jobs SET checkpoint = ?, updated_at = CURRENT_TIMESTAMP WHERE name = ?
+        ''', (checkpoint, job_name))
+
+def enqueue_bio_job(profile_id, name, company, text):
+    """Queue bio generation for a saved profile; returns the job id"""
+    conn = get_connection()
+    with conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO bio_jobs (profile_id, name, company, text) VALUES (?, ?, ?, ?)
+        ''', (profile_id, name, company, text))
+        job_id = cursor.lastrowid
+    return job_id
+
+def claim_bio_job(stale_after=300, batched_stale_after=3600):
+    """
+    Atomically take the oldest pending bio job (or one whose worker died: still
+    running after stale_after seconds, or left to a bulk import's summarizer for
+    batched_stale_after seconds) and mark it running. Returns the job or None.
+    """
+    conn = get_connection()
+    with conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE bio_jobs SET status = 'running', attempts = attempts + 1, updated_at = CURRENT_TIMESTAMP
+            WHERE id = (
+                SELECT id FROM bio_jobs
+                WHERE status = 'pending'
+                   OR (status = 'running' AND updated_at < datetime('now', ?))
+                   OR (status = 'batched' AND updated_at < datetime('now', ?))
+                ORDER BY id
+                LIMIT 1
+            )
+            RETURNING *
+        ''', (f'-{int(stale_after)} seconds', f'-{int(batched_stale_after)} seconds'))
+        row = cursor.fetchone()
+    return dict(row) if row else None
+
+def complete_bio_job(job_id, bio):
+    """Write a generated bio to its profile and mark the job done"""
+    conn = get_connection()
+    with conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE profiles SET bio = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE id = (SELECT profile_id FROM bio_jobs WHERE id = ?)
+        ''', (bio, job_id))
+        cursor.execute('''
+            UPDATE bio_jobs SET status = 'done', text = NULL, error = NULL, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (job_id,))
+
+def complete_batched_bio(profile_id, bio):
+    """Write a bio generated by a BatchSummarizer and mark the profile's batched bio job done"""
+    conn = get_connection()
+    with conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE profiles SET bio = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?
+        ''', (bio, profile_id))
+        cursor.execute('''
+            UPDATE bio_jobs SET status = 'done', text = NULL, updated_at = CURRENT_TIMESTAMP
+            WHERE profile_id = ? AND status = 'batched'
+        ''', (profile_id,))
+
+def release_batched_bio(profile_id, placeholder_bio):
+    """
+    Give up on batching a profile's bio: store placeholder_bio for now and hand
+    its batched bio job to the bio worker to retry on its own
+    """
+    conn = get_connection()
+    with conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE profiles SET bio = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?
+        ''', (placeholder_bio, profile_id))
+        cursor.execute('''
+            UPDATE bio_jobs SET status = 'pending', updated_at = CURRENT_TIMESTAMP
+            WHERE profile_id = ? AND status = 'batched'
+        ''', (profile_id,))
+
+def get_batched_bio_jobs(import_job_id):
+    """Bios still waiting on a batch for profiles saved by an import job: [(profile_id, name, company, text)]"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT b.profile_id, b.name, b.company, b.text FROM bio_jobs b
+        JOIN import_items i ON i.profile_id = b.profile_id
+        WHERE i.job_id = ? AND b.status = 'batched'
+        ORDER BY b.id
+    ''', (import_job_id,))
+    jobs = [tuple(row) for row in cursor.fetchall()]
+    cursor.close()
+    return jobs
+
+def fail_bio_job(job_id, error, max_attempts=3):
+    """Record a failed attempt; the job is retried until it has failed max_attempts times"""
+    conn = get_connection()
+    with conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE bio_jobs SET
+                status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                text = CASE WHEN attempts >= ? THEN NULL ELSE text END,
+                error = ?,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (max_attempts, max_attempts, error, job_id))
+
+def get_bio_job(job_id):
+    """A bio job's status, with the profile's bio once it is done"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT j.id, j.profile_id, j.status, j.error, p.bio FROM bio_jobs j
+        LEFT JOIN profiles p ON p.id = j.profile_id
+        WHERE j.id = ?
+    ''', (job_id,))
+    row = cursor.fetchone()
+    cursor.close()
+    return dict(row) if row else None
+
+def phash_bands(phash):
+    """Split a 64-bit perceptual hash into its PHASH_BANDS 16-bit bands"""
+    return [(phash >> (16 * band)) & 0xFFFF for band in range(PHASH_BANDS)]
+
+def get_headshot_verdict(url_key, model):
+    """A stored verdict for this image URL from this model, or None"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT is_headshot, confidence FROM headshot_verdicts WHERE url_key = ? AND model = ?
+    ''', (url_key, model))
+    row = cursor.fetchone()
+    cursor.close()
+    if row is None:
+        return None
+    record_verdict_hit(url_key)
+    return bool(row['is_headshot']), row['confidence']
+
+def find_headshot_verdict(phash, model, max_distance=PHASH_MAX_DISTANCE):
+    """The verdict for the closest stored image within max_distance bits of phash, or None"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    bands = phash_bands(phash)
+    cursor.execute(f'''
+        SELECT url_key, phash, is_headshot, confidence FROM headshot_verdicts
+        WHERE ({' OR '.join(f'band{band} = ?' for band in range(PHASH_BANDS))}) AND model = ?
+    ''', (*bands, model))
+    best, best_distance = None, max_distance + 1
+    for row in cursor.fetchall():
+        distance = bin((row['phash'] & PHASH_MASK) ^ phash).count('1')
+        if distance < best_distance:
+            best, best_distance = row, distance
+    cursor.close()
+
+    if best is None:
+        return None
+    record_verdict_hit(best['url_key'])
+    return bool(best['is_headshot']), best['confidence']
+
+def record_verdict_hit(url_key):
+    """Count a reuse of a stored verdict, writing the counts every VERDICT_HITS_FLUSH_INTERVAL seconds"""
+    with _verdict_hits_lock:
+        _verdict_hits[url_key] += 1
+        due = time.monotonic() - _verdict_hits_flushed >= VERDICT_HITS_FLUSH_INTERVAL
+    if due:
+        flush_verdict_hits()
+
+def flush_verdict_hits():
+    """Write the buffered verdict reuse counts in one transaction"""
+    global _verdict_hits_flushed
+    with _verdict_hits_lock:
+        hits = dict(_verdict_hits)
+        _verdict_hits.clear()
+        _verdict_hits_flushed = time.monotonic()
+    if not hits:
+        return
+    try:
+        conn = get_connection()
+        with conn:
+            conn.executemany('UPDATE headshot_verdicts SET hits = hits + ? WHERE url_key = ?',
+                             [(count, url_key) for url_key, count in hits.items()])
+    except sqlite3.Error as e:
+        # Keep the counts for the next flush rather than lose them
+        print(f"Could not save headshot verdict hits: {e}")
+        with _verdict_hits_lock:
+            _verdict_hits.update(hits)
+
+def save_headshot_verdict(url_key, phash, is_headshot, confidence, model):
+    """Store (or replace) the verdict for an image URL; phash may be None"""
+    bands = phash_bands(phash) if phash is not None else [None] * PHASH_BANDS
+    if phash is not None and phash >= 1 << 63:
+        phash -= 1 << 64  # SQLite integers are signed
+    conn = get_connection()
+    with conn:
+        conn.execute('''
+            INSERT INTO headshot_verdicts (url_key, phash, band0, band1, band2, band3, is_headshot, confidence, model)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(url_key) DO UPDATE SET
+                phash = excluded.phash,
+                band0 = excluded.band0,
+                band1 = excluded.band1,
+                band2 = excluded.band2,
+                band3 = excluded.band3,
+                is_headshot = excluded.is_headshot,
+                confidence = excluded.confidence,
+                model = excluded.model,
+                hits = 0,
+                created_at = CURRENT_TIMESTAMP
+        ''', (url_key, phash, *bands, int(bool(is_headshot)), int(confidence), model))
+
+def get_headshot_verdict_stats():
+    """Stored verdicts and how many model calls they have saved"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT key, value FROM verdict_stats')
+    stats = {row['key']: row['value'] for row in cursor.fetchall()}
+    cursor.close()
+    with _verdict_hits_lock:
+        stats['reused'] = stats.get('reused', 0) + sum(_verdict_hits.values())
+    return {key: stats.get(key, 0) for key in ('verdicts', 'reused', 'hashed')}
+
 # Initialize database on import
 init_db()
+atexit.register(flush_verdict_hits)
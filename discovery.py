@@ -0,0 +1,318 @@
+"""
+Async web-discovery pipeline: search -> fetch -> extract -> validate -> summarize.
+Mirrors the blocking helpers in ai_bio_scraper, but every network call runs on
+the event loop so one process can keep many lookups in flight at once.
+Request bodies, parsing, caches and model prompts are shared with the sync path.
+SQLite lookups and writes and page parsing block, so they run in worker
+threads via asyncio.to_thread.
+"""
+import asyncio
+import os
+
+import httpx
+from openai import AsyncOpenAI
+
+import ai_bio_scraper as scraper
+import database as db
+import http_client
+import image_probe
+
+# Upper bound on simultaneous outbound connections for the whole process
+ASYNC_MAX_CONNECTIONS = int(os.getenv("ASYNC_MAX_CONNECTIONS", "100"))
+ASYNC_KEEPALIVE_CONNECTIONS = int(os.getenv("ASYNC_KEEPALIVE_CONNECTIONS", "20"))
+
+_http = None
+_openai = None
+
+def get_http():
+    """Return the process-wide async HTTP client, creating it on first use"""
+    global _http
+    if _http is None:
+        _http = httpx.AsyncClient(
+            timeout=httpx.Timeout(http_client.READ_TIMEOUT, connect=http_client.CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=ASYNC_MAX_CONNECTIONS,
+                                max_keepalive_connections=ASYNC_KEEPALIVE_CONNECTIONS),
+            follow_redirects=True,
+            max_redirects=http_client.MAX_REDIRECTS
+        )
+    return _http
+
+def get_openai():
+    """Return the async OpenAI client, or None if no API key is configured"""
+    global _openai
+    if _openai is None and scraper.OPENAI_API_KEY:
+        _openai = AsyncOpenAI(api_key=scraper.OPENAI_API_KEY)
+    return _openai
+
+async def aclose():
+    """Close the shared clients (called on server shutdown)"""
+    global _http, _openai
+    if _http is not None:
+        await _http.aclose()
+        _http = None
+    if _openai is not None:
+        await _openai.close()
+        _openai = None
+
+async def request_with_retries(method, url, stream=False, retries=http_client.HTTP_RETRIES, **kwargs):
+    """
+    Send a request, retrying connection errors, 429 and 5xx with exponential backoff.
+    With stream=True the body is left unread and the caller must aclose() the response.
+    """
+    client = get_http()
+    for attempt in range(retries + 1):
+        last_attempt = attempt == retries
+        try:
+            response = await client.send(client.build_request(method, url, **kwargs), stream=stream)
+        except httpx.TransportError:
+            if last_attempt:
+                raise
+        else:
+            if last_attempt or response.status_code not in http_client.RETRY_STATUSES:
+                return response
+            await response.aclose()
+        await asyncio.sleep(0.5 * 2 ** attempt)
+
+async def tavily_request(data):
+    """Async version of ai_bio_scraper.tavily_request, sharing its cache"""
+    key = scraper.tavily_cache_key(data)
+    cached = await asyncio.to_thread(scraper.search_cache.get, key)
+    if cached is not None:
+        return cached
+
+    headers = {'Authorization': f'Bearer {scraper.TAVILY_API_KEY}'}
+    response = await request_with_retries(
+        'POST', scraper.TAVILY_URL, headers=headers, json=data,
+        timeout=httpx.Timeout(scraper.TAVILY_READ_TIMEOUT, connect=http_client.CONNECT_TIMEOUT)
+    )
+    response.raise_for_status()
+    result = response.json()
+    await asyncio.to_thread(scraper.search_cache.set, key, result)
+    return result
+
+async def tavily_search(query):
+    results = (await tavily_request(scraper.tavily_search_data(query)))['results']
+    return [(r['url'], r.get('content', '')) for r in results]
+
+async def search_person_images(name, company):
+    try:
+        result = await tavily_request(scraper.image_search_data(name, company))
+        return result.get('images', [])
+    except Exception:
+        return []
+
+async def extract_text_and_image(url, name):
+    """Async version of ai_bio_scraper.extract_text_and_image, sharing its page cache"""
+    try:
+        key = scraper.page_cache_key(url, name)
+        cached, fresh = await asyncio.to_thread(scraper.page_cache.lookup, key)
+        if fresh:
+            return cached['text'], cached['image_url']
+
+        r = await request_with_retries('GET', url, stream=True, headers=scraper.page_request_headers(cached))
+        try:
+            if cached and r.status_code == 304:
+                await asyncio.to_thread(scraper.page_cache.refresh, key)
+                return cached['text'], cached['image_url']
+
+            if scraper.is_html_response(r.headers):
+                body = await read_capped(r.aiter_bytes())
+                html = scraper.decode_page(body, r.headers.get('Content-Type'))
+                text, image_url = await asyncio.to_thread(scraper.parse_page, html, url, name)
+            else:
+                text, image_url = '', ''
+        finally:
+            await r.aclose()
+
+        if r.is_success:
+            await asyncio.to_thread(scraper.page_cache.set, key, scraper.page_cache_entry(text, image_url, r.headers))
+
+        return text, image_url
+    except Exception:
+        return '', ''
+
+async def read_capped(chunks, max_bytes=scraper.PAGE_MAX_BYTES, timeout=scraper.PAGE_DOWNLOAD_TIMEOUT):
+    """Async version of ai_bio_scraper.read_capped; the deadline also cancels a read in progress"""
+    body = bytearray()
+    try:
+        async with asyncio.timeout(timeout):
+            async for chunk in chunks:
+                body += chunk
+                if len(body) >= max_bytes:
+                    break
+    except TimeoutError:
+        pass
+    return bytes(body[:max_bytes])
+
+async def fetch_pages(url_content_pairs, name, max_concurrency=scraper.FETCH_WORKERS, deadline=scraper.FETCH_DEADLINE):
+    """
+    Async version of ai_bio_scraper.fetch_pages.
+    Yields (url, tavily_content, text, image_url) in rank order; wrap it in
+    contextlib.aclosing() so stopping early cancels the outstanding fetches.
+    """
+    pairs = scraper.dedupe_urls(url_content_pairs)
+    if not pairs:
+        return
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def fetch(url):
+        async with semaphore:
+            return await extract_text_and_image(url, name)
+
+    loop = asyncio.get_running_loop()
+    stop_at = loop.time() + deadline
+    tasks = [asyncio.ensure_future(fetch(url)) for url, _ in pairs]
+    try:
+        for (url, tavily_content), task in zip(pairs, tasks):
+            try:
+                text, img_url = await asyncio.wait_for(task, timeout=max(stop_at - loop.time(), 0))
+            except asyncio.TimeoutError:
+                text, img_url = '', ''
+            yield url, tavily_content, text, img_url
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def validate_headshot(image_url, name):
+    """Async version of ai_bio_scraper.validate_headshot (fails closed), sharing its verdict store"""
+    url_key = scraper.image_key(image_url)
+    verdict = await asyncio.to_thread(db.get_headshot_verdict, url_key, scraper.HEADSHOT_VERDICT_MODEL)
+    if verdict:
+        return verdict
+
+    # Without a model there's no verdict to ask for, so don't download the image
+    openai_client = get_openai()
+    if openai_client is None:
+        return False, 0
+
+    hashes = await fetch_image_hashes(image_url)
+    verdict = await asyncio.to_thread(scraper.find_verdict_by_hash, url_key, hashes)
+    if verdict:
+        return verdict
+
+    try:
+        response = await openai_client.chat.completions.create(
+            model=scraper.HEADSHOT_MODEL,
+            messages=scraper.headshot_messages(image_url, name),
+            max_tokens=300
+        )
+        verdict = scraper.parse_headshot_response(response.choices[0].message.content)
+    except Exception:
+        return False, 0
+
+    await asyncio.to_thread(scraper.save_verdict, url_key, hashes, verdict)
+    return verdict
+
+async def fetch_image_hashes(image_url):
+    """Async version of ai_bio_scraper.fetch_image_hashes"""
+    if image_probe.Image is None:
+        return None
+    try:
+        r = await request_with_retries('GET', image_url, stream=True, headers={'User-Agent': scraper.PAGE_USER_AGENT})
+        try:
+            if not r.is_success:
+                return None
+            body = await read_capped(r.aiter_bytes(), image_probe.IMAGE_HASH_MAX_BYTES + 1)
+        finally:
+            await r.aclose()
+    except Exception:
+        return None
+    if len(body) > image_probe.IMAGE_HASH_MAX_BYTES:
+        return None
+    # Decoding is CPU-bound; keep it off the event loop
+    return await asyncio.to_thread(image_probe.image_hashes, body)
+
+async def probe_image(image_url):
+    """Async version of ai_bio_scraper.probe_image"""
+    try:
+        # No retries: a dead link is skipped rather than retried with backoff
+        r = await request_with_retries(
+            'GET', image_url, stream=True, retries=0, headers=scraper.image_probe_headers(),
+            timeout=httpx.Timeout(image_probe.IMAGE_PROBE_TIMEOUT, connect=http_client.PROBE_CONNECT_TIMEOUT)
+        )
+        try:
+            if not r.is_success:
+                return None
+            fmt = image_probe.content_type_format(r.headers.get('Content-Type'))
+            if fmt:
+                return fmt, None, None
+
+            data = bytearray()
+            sniffed = image_probe.sniff_image(data)
+            async for chunk in r.aiter_bytes(4096):
+                data += chunk
+                sniffed = image_probe.sniff_image(data)
+                if image_probe.sniff_finished(sniffed, data):
+                    break
+            return sniffed
+        finally:
+            await r.aclose()
+    except Exception:
+        return None
+
+async def prefilter_images(image_urls, max_concurrency=image_probe.PROBE_WORKERS):
+    """Async version of ai_bio_scraper.prefilter_images"""
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def probe(img_url):
+        async with semaphore:
+            return await probe_image(img_url)
+
+    probes = await asyncio.gather(*(probe(img_url) for img_url in image_urls))
+    return image_probe.rank_images(image_urls, probes)
+
+async def find_best_headshot(image_urls, name, max_concurrency=scraper.VALIDATE_WORKERS,
+                             stop_confidence=scraper.HEADSHOT_STOP_CONFIDENCE):
+    """Async version of ai_bio_scraper.find_best_headshot"""
+    image_urls = await prefilter_images(scraper.dedupe_images(image_urls))
+    if not image_urls:
+        return None, 0
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def check(img_url):
+        async with semaphore:
+            return await validate_headshot(img_url, name)
+
+    tasks = {asyncio.ensure_future(check(img_url)): (rank, img_url)
+             for rank, img_url in enumerate(image_urls)}
+    photo_url, best_confidence, best_rank = None, 0, len(image_urls)
+    try:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                rank, img_url = tasks[task]
+                is_valid, confidence = task.result()
+                print(f"Image: {img_url[:100]}... | Valid: {is_valid} | Confidence: {confidence}")
+
+                if scraper.is_better_headshot(is_valid, confidence, rank, best_confidence, best_rank):
+                    photo_url, best_confidence, best_rank = img_url, confidence, rank
+
+            if best_confidence >= stop_confidence:
+                break
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    return photo_url, best_confidence
+
+async def summarize_bio(name, company, texts):
+    """Async version of ai_bio_scraper.summarize_bio, sharing its summary cache"""
+    openai_client = get_openai()
+    if not openai_client:
+        return scraper.basic_bio(name, company, texts)
+
+    key = scraper.summary_cache_key(name, company, texts)
+    cached = await asyncio.to_thread(scraper.summary_cache.get, key)
+    if cached is not None:
+        return cached
+
+    response = await openai_client.chat.completions.create(
+        model=scraper.SUMMARY_MODEL,
+        messages=[{"role": "user", "content": scraper.bio_prompt(name, company, texts)}]
+    )
+    bio = response.choices[0].message.content.strip()
+    await asyncio.to_thread(scraper.summary_cache.set, key, bio)
+    return bio
@@ -0,0 +1,90 @@
+"""
+Shared outbound HTTP layer.
+All Tavily calls and page fetches go through one pooled, keep-alive session
+so repeat requests to the same host reuse their TCP+TLS connection.
+"""
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Connections kept alive per host - at least FETCH_WORKERS so a concurrent
+# fan-out to one host never has to open throwaway connections
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", os.getenv("FETCH_WORKERS", "6")))
+# Number of distinct hosts whose pools are kept around
+HTTP_POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "50"))
+
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+# Probes (a few KB of an image) give up on an unresponsive host sooner
+PROBE_CONNECT_TIMEOUT = float(os.getenv("HTTP_PROBE_CONNECT_TIMEOUT", "2"))
+
+# Retries with exponential backoff (0.5s, 1s, ...) on connection errors, 429 and 5xx
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Redirect chains longer than this are abandoned (requests allows 30)
+MAX_REDIRECTS = int(os.getenv("HTTP_MAX_REDIRECTS", "5"))
+
+_session = None
+_probe_session = None
+_session_lock = threading.Lock()
+
+def _build_session(retries=True):
+    retry = Retry(
+        total=HTTP_RETRIES,
+        backoff_factor=0.5,
+        status_forcelist=RETRY_STATUSES,
+        # Tavily searches are POSTs but safe to repeat
+        allowed_methods=frozenset({'GET', 'HEAD', 'POST'}),
+        # Don't let a long Retry-After stall a web request; backoff is enough
+        respect_retry_after_header=False,
+        # Hand the last response back so callers' raise_for_status() still works
+        raise_on_status=False
+    ) if retries else 0
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_HOSTS, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+
+    session = requests.Session()
+    session.max_redirects = MAX_REDIRECTS
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def get_session():
+    """Return the process-wide session, creating it on first use"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+def get_probe_session():
+    """
+    Return the process-wide session for probes. It pools connections like
+    get_session() but never retries: a dead link is better skipped than
+    retried with backoff while a search waits.
+    """
+    global _probe_session
+    if _probe_session is None:
+        with _session_lock:
+            if _probe_session is None:
+                _probe_session = _build_session(retries=False)
+    return _probe_session
+
+def get(url, **kwargs):
+    """GET through the shared session with separate connect/read timeouts"""
+    kwargs.setdefault('timeout', (CONNECT_TIMEOUT, READ_TIMEOUT))
+    return get_session().get(url, **kwargs)
+
+def post(url, **kwargs):
+    """POST through the shared session with separate connect/read timeouts"""
+    kwargs.setdefault('timeout', (CONNECT_TIMEOUT, READ_TIMEOUT))
+    return get_session().post(url, **kwargs)
+
+def probe(url, **kwargs):
+    """GET through the no-retry probe session with a short connect timeout"""
+    kwargs.setdefault('timeout', (PROBE_CONNECT_TIMEOUT, READ_TIMEOUT))
+    return get_probe_session().get(url, **kwargs)
@@ -0,0 +1,195 @@
+"""
+Cheap checks on headshot candidates before they reach the vision model.
+Only the first few KB of each image are downloaded; the format and pixel
+size are read from the file header, and tracking pixels, SVGs, banners and
+other shapes no headshot comes in are dropped. The survivors are ordered
+so the likeliest headshot is validated first.
+
+image_hashes() also gives a perceptual hash (Pillow) so a resized,
+re-encoded or mirrored copy of an image can reuse its verdict.
+"""
+import io
+import os
+import struct
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+    print("WARNING: Pillow not installed. Headshot verdicts are only reused for the same image URL.")
+
+# Bytes fetched per image - enough for the size fields of PNG/GIF/WebP and
+# for JPEGs whose EXIF block comes before the frame header
+IMAGE_PROBE_BYTES = int(os.getenv("IMAGE_PROBE_BYTES", str(64 * 1024)))
+IMAGE_PROBE_TIMEOUT = float(os.getenv("IMAGE_PROBE_TIMEOUT", "5"))
+PROBE_WORKERS = int(os.getenv("IMAGE_PROBE_WORKERS", "8"))
+
+# Formats the vision model accepts
+RASTER_FORMATS = {'jpeg', 'png', 'gif', 'webp'}
+MIN_SIDE = int(os.getenv("IMAGE_MIN_SIDE", "100"))
+# Allowed width/height ratios - wide enough for a 3:2 photo either way up
+# (JPEG EXIF rotation isn't read), narrow enough to drop banners and strips
+MIN_ASPECT = 0.5
+MAX_ASPECT = 1.5
+
+# Largest image downloaded in full for perceptual hashing
+IMAGE_HASH_MAX_BYTES = int(os.getenv("IMAGE_HASH_MAX_BYTES", str(5 * 1024 * 1024)))
+
+# Bytes needed before giving up on recognising a format
+SNIFF_MIN_BYTES = 32
+
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+def sniff_image(data):
+    """
+    Read (format, width, height) from the start of an image file.
+    format is None if the bytes aren't a known image, and width/height are
+    None while the header hasn't fully arrived yet.
+    """
+    data = bytes(data)
+    if data.startswith(b'\x89PNG\r\n\x1a\n'):
+        if len(data) < 24:
+            return 'png', None, None
+        width, height = struct.unpack('>II', data[16:24])
+        return 'png', width, height
+
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        if len(data) < 10:
+            return 'gif', None, None
+        width, height = struct.unpack('<HH', data[6:10])
+        return 'gif', width, height
+
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return ('webp',) + webp_size(data)
+
+    if data.startswith(b'\xff\xd8'):
+        return ('jpeg',) + jpeg_size(data)
+
+    # SVG, or an HTML error page served from an image URL
+    if data.lstrip(b'\xef\xbb\xbf \t\r\n').startswith(b'<'):
+        return 'markup', None, None
+
+    if len(data) >= 12 and data[4:8] == b'ftyp':
+        return 'heif', None, None
+
+    return None, None, None
+
+def webp_size(data):
+    chunk = data[12:16]
+    if chunk == b'VP8 ' and len(data) >= 30:
+        width, height = struct.unpack('<HH', data[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L' and len(data) >= 25:
+        bits = int.from_bytes(data[21:25], 'little')
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b'VP8X' and len(data) >= 30:
+        return int.from_bytes(data[24:27], 'little') + 1, int.from_bytes(data[27:30], 'little') + 1
+    return None, None
+
+def jpeg_size(data):
+    """Walk the JPEG segments up to the first frame header"""
+    i = 2
+    while i + 9 <= len(data):
+        if data[i] != 0xFF:
+            return None, None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            i += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            i += 2
+            continue
+        if marker in JPEG_SOF_MARKERS:
+            height, width = struct.unpack('>HH', data[i + 5:i + 9])
+            return width, height
+        i += 2 + struct.unpack('>H', data[i + 2:i + 4])[0]
+    return None, None
+
+def content_type_format(content_type):
+    """Format implied by a Content-Type that rules an image out before reading it, else None"""
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    if content_type == 'image/svg+xml':
+        return 'svg'
+    if content_type.startswith(('text/', 'application/json', 'video/', 'audio/')):
+        return content_type
+    return None
+
+def sniff_finished(sniffed, data, max_bytes=IMAGE_PROBE_BYTES):
+    """Whether reading more of the file could still change sniff_image's answer"""
+    fmt, _, height = sniffed
+    if height is not None or len(data) >= max_bytes:
+        return True
+    if fmt is None:
+        return len(data) >= SNIFF_MIN_BYTES
+    return fmt not in RASTER_FORMATS
+
+def reject_reason(sniffed):
+    """Why a probed image can't be a headshot, or None if it might be"""
+    if sniffed is None:
+        return 'could not be fetched'
+    fmt, width, height = sniffed
+    if fmt is None:
+        return 'not an image'
+    if fmt not in RASTER_FORMATS:
+        return f'unsupported format ({fmt})'
+    if not width or not height:
+        # Size fields past IMAGE_PROBE_BYTES (a JPEG with a huge EXIF block) - let the model judge it
+        return None
+    if min(width, height) < MIN_SIDE:
+        return f'too small ({width}x{height})'
+    if not MIN_ASPECT <= width / height <= MAX_ASPECT:
+        return f'wrong shape ({width}x{height})'
+    return None
+
+def shape_score(width, height):
+    """Higher for the portrait-to-square, reasonably sized images headshots tend to be"""
+    if not width or not height:
+        return -1
+    score = 0
+    if 0.66 <= width / height <= 1.0:
+        score += 2
+    if min(width, height) >= 200:
+        score += 1
+    return score
+
+def rank_images(image_urls, probes):
+    """
+    Drop images that failed the probe and order the rest by shape_score,
+    keeping the original order among equals. probes[i] is image_urls[i]'s
+    sniff_image result (None if it couldn't be fetched).
+    """
+    ranked = []
+    for img_url, sniffed in zip(image_urls, probes):
+        reason = reject_reason(sniffed)
+        if reason:
+            print(f"Image: {img_url[:100]}... | Skipped: {reason}")
+            continue
+        ranked.append((shape_score(sniffed[1], sniffed[2]), img_url))
+    ranked.sort(key=lambda item: item[0], reverse=True)
+    return [img_url for _, img_url in ranked]
+
+def image_hashes(data):
+    """
+    64-bit difference hashes (dHash) of an image and of its mirror image, or
+    None if Pillow isn't installed or the bytes don't decode.
+    """
+    if Image is None:
+        return None
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            # Let JPEGs decode at reduced size; only a 9x8 thumbnail is needed
+            img.draft('L', (64, 64))
+            small = img.convert('L').resize((9, 8), Image.LANCZOS)
+    except Exception:
+        return None
+    return dhash(small), dhash(small.transpose(Image.FLIP_LEFT_RIGHT))
+
+def dhash(small):
+    """One bit per horizontally adjacent pixel pair of a 9x8 grayscale image: is it getting brighter?"""
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            value = (value << 1) | (left < pixels[row * 9 + col + 1])
+    return value
@@ -88,20 +88,14 @@ def initialize_profiles():
 
     if current_count == 0:
         print("Initializing database with sample profiles...")
-        for profile in INITIAL_PROFILES:
-            try:
-                profile_id = db.save_profile(
-                    name=profile['name'],
-                    company=profile['company'],
-                    bio=profile['bio'],
-                    photo_url=profile['photo_url'],
-                    snippet=profile['snippet'],
-                    source_urls=profile['source_urls'],
-                    image_confidence=0
-                )
+        try:
+            # One transaction for the whole seed
+            profile_ids = db.save_profiles_bulk(INITIAL_PROFILES)
+            for profile, profile_id in zip(INITIAL_PROFILES, profile_ids):
                 print(f"  ✓ Added {profile['name']} (ID: {profile_id})")
-            except Exception as e:
-                print(f"  ✗ Failed to add {profile['name']}: {e}")
+        except Exception as e:
+            print(f"  ✗ Failed to add sample profiles: {e}")
+            return
 
         print(f"\n✅ Database initialized with {len(INITIAL_PROFILES)} profiles")
     else:
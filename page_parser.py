@@ -0,0 +1,258 @@
+"""
+Single-pass page extraction.
+PageParser walks the HTML once with the stdlib tokenizer and collects
+everything ai_bio_scraper.parse_page needs - paragraph/heading text, JSON-LD
+blocks, the og:image tag and scored <img> candidates - without building a tree.
+extract() returns the same (text, image_url) as the BeautifulSoup version.
+"""
+import html
+import json
+from html.entities import html5 as HTML5_ENTITIES
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+TEXT_TAGS = {'p', 'h1', 'h2', 'h3'}
+# Elements whose text BeautifulSoup keeps out of get_text()
+HIDDEN_TEXT_TAGS = {'script', 'style', 'template'}
+VOID_TAGS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen', 'link',
+    'menuitem', 'meta', 'param', 'source', 'track', 'wbr', 'basefont', 'bgsound',
+    'command', 'frame', 'image', 'isindex', 'nextid', 'spacer'
+}
+
+LINKEDIN_IMG_CLASSES = ('profile', 'avatar', 'photo')
+BAD_SRC_WORDS = ('logo', 'icon', 'banner', 'cover', 'background', '.svg', 'illustration',
+                 'cartoon', 'graphic', 'placeholder')
+BAD_ALT_WORDS = ('illustration', 'cartoon', 'graphic', 'icon')
+HEADSHOT_ALT_WORDS = ('headshot', 'portrait', 'professional photo')
+HEADSHOT_CLASS_WORDS = ('profile', 'headshot', 'avatar', 'photo', 'portrait')
+HEADSHOT_SRC_WORDS = ('profile', 'headshot', 'avatar', 'portrait')
+BAD_OG_WORDS = ('logo', 'banner', 'cover', 'default', 'og-image')
+
+class PageParser(HTMLParser):
+    """Collects text blocks, JSON-LD, og:image and headshot candidates in one pass"""
+
+    def __init__(self, name):
+        # Character references are resolved below, the way BeautifulSoup does it
+        super().__init__(convert_charrefs=False)
+        self.name_parts = [part.lower() for part in name.split()]
+        self.blocks = []        # text parts of each p/h1/h2/h3, in document order
+        self.open = []          # (tag, block parts or None) for every open element
+        self.hidden = 0         # open script/style/template elements
+        self.closed_voids = {}  # void tag -> start tags whose end tag may still turn up
+        self.data = []          # text seen since the last tag
+        self.json_ld = []       # contents of each <script type="application/ld+json">
+        self.script = None      # text parts of the JSON-LD script being read
+        self.linkedin_img = None
+        self.og_image = None
+        self.best_image = None
+        self.best_score = 0
+
+    def handle_starttag(self, tag, attrs):
+        self.start(tag, attrs)
+        if tag in VOID_TAGS:
+            self.closed_voids[tag] = self.closed_voids.get(tag, 0) + 1
+
+    def handle_startendtag(self, tag, attrs):
+        self.start(tag, attrs)
+        self.end(tag)
+
+    def handle_endtag(self, tag):
+        # The </br> of a <br></br> is swallowed without ending the current text,
+        # as BeautifulSoup does
+        if self.closed_voids.get(tag):
+            self.closed_voids[tag] -= 1
+        else:
+            self.end(tag)
+
+    def start(self, tag, attrs):
+        self.flush()
+        attrs = dict(attrs)
+
+        if tag == 'img':
+            self.add_image(attrs)
+        elif tag == 'meta':
+            if self.og_image is None and attrs.get('property') == 'og:image':
+                self.og_image = attrs.get('content') or ''
+        elif tag == 'script' and attrs.get('type') == 'application/ld+json':
+            self.script = []
+            self.json_ld.append(self.script)
+
+        if tag in VOID_TAGS:
+            return
+
+        block = None
+        if tag in TEXT_TAGS:
+            block = []
+            self.blocks.append(block)
+        if tag in HIDDEN_TEXT_TAGS:
+            self.hidden += 1
+        self.open.append((tag, block))
+
+    def end(self, tag):
+        self.flush()
+        # Like BeautifulSoup, an end tag closes everything opened after its
+        # start tag, and a stray end tag is ignored
+        for i in range(len(self.open) - 1, -1, -1):
+            if self.open[i][0] == tag:
+                for closed, _ in self.open[i:]:
+                    if closed in HIDDEN_TEXT_TAGS:
+                        self.hidden -= 1
+                    if closed == 'script':
+                        self.script = None
+                del self.open[i:]
+                return
+
+    def handle_data(self, data):
+        self.data.append(data)
+
+    def handle_charref(self, name):
+        self.data.append(html.unescape(f'&#{name};'))
+
+    def handle_entityref(self, name):
+        # An unknown entity stays literal, minus its semicolon (as in BeautifulSoup)
+        self.data.append(HTML5_ENTITIES.get(name + ';', '&' + name))
+
+    def handle_comment(self, data):
+        self.flush()
+
+    def handle_decl(self, decl):
+        self.flush()
+
+    def handle_pi(self, data):
+        self.flush()
+
+    def unknown_decl(self, data):
+        self.flush()
+        # BeautifulSoup keeps CDATA sections as text, even in hidden elements
+        if data.upper().startswith('CDATA['):
+            data = data[len('CDATA['):].strip()
+            if data:
+                for _, block in self.open:
+                    if block is not None:
+                        block.append(data)
+
+    def close(self):
+        super().close()
+        self.flush()
+
+    def flush(self):
+        """Hand the text collected since the last tag to the open blocks"""
+        if not self.data:
+            return
+        data = ''.join(self.data)
+        self.data = []
+
+        if self.script is not None:
+            self.script.append(data)
+        if self.hidden:
+            return
+        data = data.strip()
+        if data:
+            for _, block in self.open:
+                if block is not None:
+                    block.append(data)
+
+    def add_image(self, attrs):
+        img_class = (attrs.get('class') or '').lower()
+        # BeautifulSoup splits class into a list; it is only used joined with spaces
+        img_class = ' '.join(img_class.split())
+
+        if self.linkedin_img is None and img_class and any(x in img_class for x in LINKEDIN_IMG_CLASSES):
+            self.linkedin_img = attrs.get('src') or ''
+
+        src = attrs.get('src') or ''
+        src_lower = src.lower()
+        alt = (attrs.get('alt') or '').lower()
+        title = (attrs.get('title') or '').lower()
+
+        # Skip obviously bad images
+        if any(bad in src_lower for bad in BAD_SRC_WORDS):
+            return
+        if any(bad in alt for bad in BAD_ALT_WORDS):
+            return
+        if not src or src.startswith('data:'):
+            return
+
+        score = 0
+        if any(k in alt for k in HEADSHOT_ALT_WORDS):
+            score += 10
+        if any(k in img_class for k in HEADSHOT_CLASS_WORDS):
+            score += 8
+        if any(k in src_lower for k in HEADSHOT_SRC_WORDS):
+            score += 7
+
+        # Name matching
+        matches = [part in alt or part in src_lower or part in title for part in self.name_parts]
+        if all(matches):
+            score += 15
+        elif any(matches):
+            score += 5
+
+        # Size hints (bigger is more likely to be a headshot)
+        width = attrs.get('width') or ''
+        height = attrs.get('height') or ''
+        if width and height:
+            try:
+                w, h = int(width), int(height)
+                if 150 <= w <= 800 and 150 <= h <= 800:
+                    score += 3
+            except ValueError:
+                pass
+
+        # Ties go to the earliest image
+        if score > self.best_score:
+            self.best_score = score
+            self.best_image = src
+
+    def text(self):
+        return ' '.join(''.join(block) for block in self.blocks)
+
+    def json_ld_image(self):
+        """Image of the first JSON-LD Person (a Person found in a list can be overridden by a later script)"""
+        image_url = ''
+        for parts in self.json_ld:
+            try:
+                data = json.loads(''.join(parts)) if parts else None
+            except (ValueError, RecursionError):
+                continue
+            if isinstance(data, dict):
+                if data.get('@type') == 'Person' and data.get('image'):
+                    return data.get('image')
+            elif isinstance(data, list):
+                for item in data:
+                    if isinstance(item, dict) and item.get('@type') == 'Person' and item.get('image'):
+                        image_url = item.get('image')
+                        break
+        return image_url
+
+def extract(html, url, name):
+    """Extract (text, image_url) from a page's HTML"""
+    parser = PageParser(name)
+    parser.feed(html)
+    parser.close()
+
+    image_url = ''
+
+    # Strategy 1: LinkedIn profile images have specific classes
+    if 'linkedin.com' in url.lower() and parser.linkedin_img:
+        image_url = parser.linkedin_img
+
+    # Strategy 2: structured data (JSON-LD)
+    if not image_url:
+        image_url = parser.json_ld_image()
+
+    # Strategy 3: the best-scoring person-like <img>
+    if not image_url and parser.best_image:
+        image_url = parser.best_image
+
+    # Strategy 4: og:image, unless it looks like a generic asset
+    if not image_url and parser.og_image:
+        if not any(bad in parser.og_image.lower() for bad in BAD_OG_WORDS):
+            image_url = parser.og_image
+
+    # Ensure absolute URL
+    if image_url and not image_url.startswith('http'):
+        image_url = urljoin(url, image_url)
+
+    return parser.text(), image_url
@@ -0,0 +1,59 @@
+"""
+Token-bucket rate limits for upstream services (Tavily, OpenAI, scraped hosts).
+Limits are off until configured, so interactive searches are unaffected;
+bulk_import turns them on instead of sleeping between names.
+"""
+import threading
+import time
+
+class TokenBucket:
+    """Allows `rate` calls per second on average, with bursts of up to `burst` calls"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+_limits = {}   # upstream -> (rate per second, burst)
+_buckets = {}  # (upstream, key) -> TokenBucket
+_lock = threading.Lock()
+
+def configure(upstream, per_minute, burst=None):
+    """
+    Limit an upstream to per_minute calls (None or 0 removes the limit).
+    For keyed upstreams such as 'hosts', every key gets its own bucket at this rate.
+    """
+    with _lock:
+        for bucket_key in [k for k in _buckets if k[0] == upstream]:
+            del _buckets[bucket_key]
+        if per_minute:
+            _limits[upstream] = (per_minute / 60.0, burst)
+        else:
+            _limits.pop(upstream, None)
+
+def acquire(upstream, key=None):
+    """Wait for permission to call upstream (a no-op if it has no limit)"""
+    limit = _limits.get(upstream)
+    if not limit:
+        return
+
+    with _lock:
+        bucket = _buckets.get((upstream, key))
+        if bucket is None:
+            bucket = _buckets[(upstream, key)] = TokenBucket(*limit)
+    bucket.acquire()
@@ -1,4 +1,4 @@
-import requests
+import http_client
 from bs4 import BeautifulSoup
 import json
 
@@ -14,13 +14,13 @@ def tavily_search(query):
         'include_domains': ['linkedin.com', 'crunchbase.com', 'company.com'],
         'max_results': 5
     }
-    response = requests.post(url, headers=headers, json=data)
+    response = http_client.post(url, headers=headers, json=data)
     response.raise_for_status()
     return response.json()['results']
 
 def extract_info_from_url(url):
     try:
-        resp = requests.get(url, timeout=10)
+        resp = http_client.get(url)
         soup = BeautifulSoup(resp.text, 'html.parser')
 
         # Try meta tags
@@ -1,10 +1,15 @@
+import base64
+import json
 import os
+import secrets
 import requests
 from bs4 import BeautifulSoup
 from flask import Flask, request, render_template, jsonify, redirect, url_for
 from dotenv import load_dotenv
 from openai import OpenAI
 import database as db
+from cache import SQLiteCache
+import bio_worker
 
 # Load environment variables
 load_dotenv()
@@ -24,21 +29,49 @@ app = Flask(__name__)
 # Import all helper functions from ai_bio_scraper
 from ai_bio_scraper import (
     tavily_search, extract_text_and_image, extract_company_from_text,
-    validate_headshot, summarize_bio, search_person_images_google
+    validate_headshot, summarize_bio, search_person_images_google,
+    fetch_pages, search_cache, page_cache, summary_cache
 )
 
 @app.route('/')
 def index():
     return render_template('socialbook.html')
 
+def encode_cursor(profile):
+    """Opaque /browse cursor pointing just past this profile"""
+    raw = json.dumps([profile['created_at'], profile['id']]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_cursor(cursor):
+    """(created_at, id) from a /browse cursor, or None if it isn't one of ours"""
+    try:
+        created_at, profile_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return str(created_at), int(profile_id)
+    except Exception:
+        return None
+
 @app.route('/browse')
 def browse():
-    """Browse all profiles in the social book"""
+    """
+    Browse all profiles in the social book.
+    Pass the previous response's next_cursor to get the following page without
+    an OFFSET scan; page alone still works for old links.
+    """
     page = int(request.args.get('page', 1))
     per_page = 20
-    offset = (page - 1) * per_page
 
-    profiles = db.get_all_profiles(limit=per_page, offset=offset)
+    cursor = request.args.get('cursor')
+    if cursor:
+        after = decode_cursor(cursor)
+        if not after:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        profiles = db.get_all_profiles(limit=per_page + 1, after=after, view='card')
+    else:
+        profiles = db.get_all_profiles(limit=per_page + 1, offset=(page - 1) * per_page, view='card')
+
+    # One extra row tells us whether there is a next page
+    has_more = len(profiles) > per_page
+    profiles = profiles[:per_page]
     total = db.get_profile_count()
     total_pages = (total + per_page - 1) // per_page
 
@@ -46,9 +79,175 @@ def browse():
         'profiles': profiles,
         'page': page,
         'total_pages': total_pages,
-        'total_count': total
+        'total_count': total,
+        'next_cursor': encode_cursor(profiles[-1]) if has_more else None
     })
 
+@app.route('/profile/<int:profile_id>')
+def profile_detail(profile_id):
+    """Full profile (bio, sources, confidence) for the detail view"""
+    profile = db.get_profile_by_id(profile_id)
+    if not profile:
+        return jsonify({'error': 'Profile not found'}), 404
+    return jsonify(profile)
+
+@app.route('/profiles/search')
+def profiles_search():
+    """
+    Search the directory only (never the web).
+    Query args: q (any field), name, company, has_photo (1/0), min_confidence,
+    limit (1-100), view (card or full; default card)
+    """
+    has_photo = request.args.get('has_photo')
+    min_confidence = request.args.get('min_confidence', type=int)
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    view = request.args.get('view', 'card')
+    if view not in db.PROFILE_VIEWS:
+        return jsonify({'error': 'view must be card or full'}), 400
+
+    profiles = db.search_profiles(
+        query=request.args.get('q'),
+        name=request.args.get('name'),
+        company=request.args.get('company'),
+        has_photo=None if has_photo in (None, '') else has_photo.lower() in ('1', 'true', 'yes'),
+        min_confidence=min_confidence,
+        limit=limit,
+        view=view
+    )
+    return jsonify({'profiles': profiles, 'count': len(profiles)})
+
+# Stop the web fallback once this many unique-company candidates are in hand
+MAX_CANDIDATES = 8
+
+# Web candidates (with their scraped page text) are kept server-side under a
+# random token until the user picks one; the browser only sees the token
+CANDIDATE_TTL = int(os.getenv("CANDIDATE_TTL", "1800"))
+candidate_store = SQLiteCache('candidates', ttl=CANDIDATE_TTL, max_entries=10000)
+
+def web_query(name, company):
+    """Tavily query for the web fallback of /search"""
+    return f"{name} {company} professional bio" if company else f"{name} professional bio LinkedIn"
+
+def search_database(name, company, force_web=False):
+    """
+    Look for name (optionally at company) in the directory.
+    Returns the /search response for an exact match, or close spellings of the
+    name as "did you mean" candidates, or None to fall through to the web.
+    force_web skips the close spellings (the user already rejected them).
+    """
+    # Exact (case-insensitive) name match, narrowed by company if specified
+    exact_matches = db.find_profiles_by_name(name, company)
+    print(f"Found {len(exact_matches)} matching profiles in database", flush=True)
+
+    if exact_matches:
+        if len(exact_matches) == 1:
+            print(f"Exact match found in DB, returning profile", flush=True)
+            return {
+                'source': 'database',
+                'profile': exact_matches[0],
+                'found_in_db': True
+            }
+        else:
+            # Multiple matches - let user choose
+            return {
+                'source': 'database',
+                'candidates': exact_matches,
+                'count': len(exact_matches),
+                'found_in_db': True
+            }
+
+    if not force_web:
+        similar = db.find_similar_names(name, company)
+        if similar:
+            print(f"No exact match, {len(similar)} similar names in DB", flush=True)
+            return {
+                'source': 'database',
+                'candidates': similar,
+                'count': len(similar),
+                'found_in_db': True,
+                'did_you_mean': True
+            }
+
+    return None
+
+def candidate_from_page(name, url, tavily_content, text, img_url):
+    """Build a web candidate from a fetched page, or None if there is too little text"""
+    # Use Tavily content if scraping failed
+    if not text or len(text.strip()) < 20:
+        text = tavily_content
+
+    if not text or len(text.strip()) < 10:
+        return None
+
+    # Extract company
+    profile_company = extract_company_from_text(text, url)
+    if not profile_company:
+        from urllib.parse import urlparse
+        domain = urlparse(url).netloc
+        if not any(social in domain for social in ['linkedin.com', 'twitter.com', 'facebook.com']):
+            profile_company = domain.replace('www.', '').split('.')[0].title()
+        else:
+            profile_company = "Company Not Listed"
+
+    # Create snippet
+    snippet = text[:200].strip()
+    if len(text) > 200:
+        snippet += "..."
+
+    return {
+        'name': name,
+        'company': profile_company,
+        'photo_url': img_url,
+        'snippet': snippet,
+        'source_url': url,
+        'full_text': text
+    }
+
+def publish_candidates(candidates):
+    """Store candidates server-side; returns copies for the client with a token instead of full_text"""
+    public = []
+    for candidate in candidates:
+        token = secrets.token_urlsafe(16)
+        candidate_store.set(token, candidate)
+        client_copy = {key: value for key, value in candidate.items() if key != 'full_text'}
+        client_copy['token'] = token
+        public.append(client_copy)
+    return public
+
+def resolve_candidate(token):
+    """The stored candidate for a token from publish_candidates, or None if unknown or expired"""
+    if not isinstance(token, str) or not token:
+        return None
+    return candidate_store.get(token)
+
+def save_candidate(candidate):
+    """
+    Save a web candidate right away (bio still empty) and queue its bio.
+    Returns (saved profile, bio job id); clients poll /bio_jobs/<id> for the bio.
+    """
+    profile_id = db.save_profile(
+        name=candidate['name'],
+        company=candidate['company'],
+        bio=None,
+        photo_url=candidate['photo_url'],
+        snippet=candidate['snippet'],
+        source_urls=[candidate['source_url']],
+        image_confidence=0
+    )
+    job_id = bio_worker.enqueue(profile_id, candidate['name'], candidate['company'], candidate['full_text'])
+    return db.get_profile_by_id(profile_id), job_id
+
+def auto_saved_response(candidate):
+    """Save the only web candidate and build the /search response"""
+    saved_profile, job_id = save_candidate(candidate)
+    return {
+        'source': 'web',
+        'profile': saved_profile,
+        'found_in_db': False,
+        'newly_added': True,
+        'bio_job': job_id
+    }
+
 @app.route('/search', methods=['POST'])
 def search():
     """Search for a person - check DB first, then web if not found"""
@@ -61,86 +260,35 @@ def search():
     print(f"\n=== Searching for: {name} (company: {company or 'any'}) ===", flush=True)
 
     # Step 1: Search database first
-    db_results = db.search_profiles(name)
-    print(f"Found {len(db_results)} profiles in database", flush=True)
-
-    # Filter by company if specified
-    if company and db_results:
-        db_results = [p for p in db_results if company.lower() in (p.get('company') or '').lower()]
-
-    # If exact match found in DB, return it
-    if db_results:
-        exact_matches = [p for p in db_results if p['name'].lower() == name.lower()]
-        if exact_matches:
-            if len(exact_matches) == 1:
-                print(f"Exact match found in DB, returning profile", flush=True)
-                return jsonify({
-                    'source': 'database',
-                    'profile': exact_matches[0],
-                    'found_in_db': True
-                })
-            else:
-                # Multiple matches - let user choose
-                return jsonify({
-                    'source': 'database',
-                    'candidates': exact_matches,
-                    'count': len(exact_matches),
-                    'found_in_db': True
-                })
+    force_web = request.form.get('force_web') == '1'
+    db_response = search_database(name, company, force_web)
+    if db_response:
+        return jsonify(db_response)
 
     # Step 2: If not in DB, search the web
     print(f"Not found in DB, searching web...", flush=True)
 
-    query = f"{name} {company} professional bio" if company else f"{name} professional bio LinkedIn"
-
     try:
-        url_content_pairs = tavily_search(query)
+        url_content_pairs = tavily_search(web_query(name, company))
         print(f"Found {len(url_content_pairs)} web results", flush=True)
 
         candidates = []
         seen_companies = set()
 
-        for url, tavily_content in url_content_pairs[:10]:
-            # Extract info
-            text, img_url = extract_text_and_image(url, name)
-
-            # Use Tavily content if scraping failed
-            if not text or len(text.strip()) < 20:
-                text = tavily_content
-
-            if not text or len(text.strip()) < 10:
+        # Pages are fetched concurrently; stopping early cancels the rest
+        for url, tavily_content, text, img_url in fetch_pages(url_content_pairs[:10], name):
+            candidate = candidate_from_page(name, url, tavily_content, text, img_url)
+            if not candidate:
                 continue
 
-            # Extract company
-            profile_company = extract_company_from_text(text, url)
-            if not profile_company:
-                from urllib.parse import urlparse
-                domain = urlparse(url).netloc
-                if not any(social in domain for social in ['linkedin.com', 'twitter.com', 'facebook.com']):
-                    profile_company = domain.replace('www.', '').split('.')[0].title()
-                else:
-                    profile_company = "Company Not Listed"
-
             # Deduplicate by company
-            if profile_company in seen_companies:
+            if candidate['company'] in seen_companies:
                 continue
-            seen_companies.add(profile_company)
-
-            # Create snippet
-            snippet = text[:200].strip()
-            if len(text) > 200:
-                snippet += "..."
-
-            candidates.append({
-                'name': name,
-                'company': profile_company,
-                'photo_url': img_url,
-                'snippet': snippet,
-                'source_url': url,
-                'full_text': text
-            })
-
-            if len(candidates) >= 8:
+            seen_companies.add(candidate['company'])
+
+            candidates.append(candidate)
+
+            if len(candidates) >= MAX_CANDIDATES:
                 break
 
         if not candidates:
@@ -148,33 +296,13 @@ def search():
 
         # If only one candidate, auto-save and return
         if len(candidates) == 1:
-            print(f"Only one candidate found, generating bio and saving...", flush=True)
-            candidate = candidates[0]
-            bio = summarize_bio(name, candidate['company'], candidate['full_text'])
-
-            # Save to database
-            profile_id = db.save_profile(
-                name=name,
-                company=candidate['company'],
-                bio=bio,
-                photo_url=candidate['photo_url'],
-                snippet=candidate['snippet'],
-                source_urls=[candidate['source_url']],
-                image_confidence=0
-            )
-
-            saved_profile = db.get_profile_by_id(profile_id)
-            return jsonify({
-                'source': 'web',
-                'profile': saved_profile,
-                'found_in_db': False,
-                'newly_added': True
-            })
+            print(f"Only one candidate found, saving and queueing its bio...", flush=True)
+            return jsonify(auto_saved_response(candidates[0]))
 
         # Multiple candidates - return for user selection
         return jsonify({
             'source': 'web',
-            'candidates': candidates,
+            'candidates': publish_candidates(candidates),
             'count': len(candidates),
             'found_in_db': False
         })
@@ -185,39 +313,28 @@ def search():
         print(traceback.format_exc(), flush=True)
         return jsonify({'error': str(e)}), 500
 
+def saved_profile_response(candidate):
+    """Save a user-selected candidate and build the /save_profile response"""
+    saved_profile, job_id = save_candidate(candidate)
+    return {
+        'success': True,
+        'profile': saved_profile,
+        'bio_job': job_id
+    }
+
 @app.route('/save_profile', methods=['POST'])
 def save_profile():
-    """Save a selected candidate to the database"""
-    data = request.json
-    name = data.get('name')
-    company = data.get('company')
-    snippet = data.get('snippet')
-    photo_url = data.get('photo_url')
-    source_url = data.get('source_url')
-    full_text = data.get('full_text', '')
+    """Save a selected candidate (by the token /search returned) to the database"""
+    data = request.get_json(silent=True) or {}
+    candidate = resolve_candidate(data.get('token'))
+    if not candidate:
+        return jsonify({'error': 'This search result has expired, please search again'}), 410
 
-    print(f"Saving profile for {name} at {company}", flush=True)
+    print(f"Saving profile for {candidate['name']} at {candidate['company']}", flush=True)
 
     try:
-        # Generate full bio
-        bio = summarize_bio(name, company, full_text)
-
-        # Save to database
-        profile_id = db.save_profile(
-            name=name,
-            company=company,
-            bio=bio,
-            photo_url=photo_url,
-            snippet=snippet,
-            source_urls=[source_url],
-            image_confidence=0
-        )
-
-        saved_profile = db.get_profile_by_id(profile_id)
-        return jsonify({
-            'success': True,
-            'profile': saved_profile
-        })
+        # The bio is generated in the background (see bio_worker.py)
+        return jsonify(saved_profile_response(candidate))
 
     except Exception as e:
         import traceback
@@ -225,12 +342,32 @@ def save_profile():
         print(traceback.format_exc(), flush=True)
         return jsonify({'error': str(e)}), 500
 
+@app.route('/bio_jobs/<int:job_id>')
+def bio_job_status(job_id):
+    """Poll a queued bio: status is pending, running, done or failed; bio is set once done"""
+    job = db.get_bio_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
+@app.before_request
+def start_bio_worker():
+    # Picks up jobs queued before a restart (and starts the thread in each forked worker)
+    bio_worker.ensure_worker()
+
 @app.route('/stats')
 def stats():
     """Get statistics about the social book"""
-    total = db.get_profile_count()
+    profile_stats = db.get_profile_stats()
     return jsonify({
-        'total_profiles': total
+        'total_profiles': profile_stats['total'],
+        'profiles_with_photo': profile_stats['with_photo'],
+        'profiles_without_photo': profile_stats['without_photo'],
+        'top_companies': profile_stats['top_companies'],
+        'search_cache': search_cache.stats(),
+        'page_cache': page_cache.stats(),
+        'summary_cache': summary_cache.stats(),
+        'headshot_verdicts': db.get_headshot_verdict_stats()
     })
 
 if __name__ == '__main__':
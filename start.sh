@@ -2,5 +2,9 @@
 # Initialize database with sample data
 python init_data.py
 
-# Start the application
-gunicorn socialbook:app
+# Resume any file imports interrupted by a restart with the options they were started with
+# (no-op if there are none; imports another replica is running are left to it)
+python bulk_import.py --resume &
+
+# Start the application (async discovery endpoints + Flask for everything else)
+uvicorn asgi:app --host 0.0.0.0 --port ${PORT:-5001}
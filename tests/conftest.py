@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# The app is a flat set of modules in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# database.py and ai_bio_scraper open their SQLite files in the working
+# directory on import, and each thread keeps its connection, so run the whole
+# session from a scratch directory instead of the checkout
+os.chdir(tempfile.mkdtemp(prefix='socialbook-tests-'))
@@ -0,0 +1,67 @@
+"""
+With --batch-summaries a profile is saved (and its record checkpointed) before
+its bio is written; killing the summarizer in between must not lose the bio.
+"""
+import functools
+
+import pytest
+
+import bulk_import
+import database as db
+from batch_summarize import BatchSummarizer
+
+PEOPLE = ['Jane Doe', 'John Roe', 'Mary Major']
+
+def fake_find_profile(name, company=None, summarizer=None):
+    profile = {
+        'name': name,
+        'company': 'Acme',
+        'bio': None if summarizer else f"{name} works at Acme.",
+        'photo_url': None,
+        'snippet': f"{name} is an engineer",
+        'source_urls': ['https://acme.example.com/team'],
+        'image_confidence': 0
+    }
+    return profile, f"{name} is an engineer at Acme."
+
+def fake_summarize_batch(batch):
+    return {profile_id: f"{name} builds things at {company}." for profile_id, name, company, _ in batch}
+
+class KilledSummarizer:
+    """Drops every job, like a process killed before its batches were sent"""
+
+    def __init__(self, batch_size, **kwargs):
+        pass
+
+    def submit(self, profile_id, name, company, text):
+        pass
+
+    def close(self):
+        raise RuntimeError('killed')
+
+def read_bios(names):
+    cursor = db.get_connection().cursor()
+    cursor.execute(
+        f"SELECT name, bio FROM profiles WHERE name IN ({','.join('?' * len(names))})", names)
+    return dict(cursor.fetchall())
+
+def test_resume_fills_bios_lost_with_the_summarizer(tmp_path, monkeypatch):
+    source = tmp_path / 'people.csv'
+    source.write_text('name,company\n' + ''.join(f"{name},Acme\n" for name in PEOPLE))
+    monkeypatch.setattr(bulk_import, 'find_profile', fake_find_profile)
+
+    monkeypatch.setattr(bulk_import, 'BatchSummarizer', KilledSummarizer)
+    with pytest.raises(RuntimeError, match='killed'):
+        bulk_import.import_file(str(source), workers=2, batch_size=10)
+
+    assert read_bios(PEOPLE) == {name: None for name in PEOPLE}
+    [job] = db.get_unfinished_import_jobs()
+    assert job['checkpoint'] == len(PEOPLE)
+
+    monkeypatch.setattr(bulk_import, 'BatchSummarizer',
+                        functools.partial(BatchSummarizer, max_wait=0.1, summarize_batch=fake_summarize_batch))
+    bulk_import.resume_unfinished()
+
+    assert read_bios(PEOPLE) == {name: f"{name} builds things at Acme." for name in PEOPLE}
+    assert db.get_unfinished_import_jobs() == []
+    assert db.get_batched_bio_jobs(job['id']) == []
@@ -0,0 +1,66 @@
+"""
+page_parser.extract must return exactly what the BeautifulSoup version
+(ai_bio_scraper.parse_page_soup) does, so PAGE_PARSER can be switched
+either way without changing search results.
+"""
+import os
+
+import pytest
+
+import page_parser
+from ai_bio_scraper import parse_page_soup
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+# fixture file -> (page URL, person searched for, image_url both parsers should pick)
+FIXTURES = {
+    'linkedin_profile.html': (
+        'https://www.linkedin.com/in/jane-doe', 'Jane Doe',
+        'https://media.licdn.com/dms/image/C4E03/profile-displayphoto-shrink_400_400/jane.jpg'),
+    'team_page.html': (
+        'https://acme.example.com/team/', 'Jane Doe',
+        'https://acme.example.com/img/team/jane-doe-portrait.jpg'),
+    'json_ld_person.html': (
+        'https://events.example.org/speakers/jane-doe', 'Jane Doe',
+        'https://cdn.example.org/people/jane-doe.jpg'),
+    'og_image_only.html': (
+        'https://janedoe.example.net/about', 'Jane Doe',
+        'https://janedoe.example.net/images/jane-at-conference.jpg'),
+    'messy_markup.html': (
+        'https://example.com/people/jane', 'Jane Doe',
+        'https://example.com/photos/JANE-DOE.JPG'),
+}
+
+# Markup quirks where a hand-written parser most easily drifts from BeautifulSoup
+SNIPPETS = [
+    '<p>a<br></br>b</p>',
+    '<p>x</br>y</p>',
+    '<p>&foo; &amp co &#150; &#x41; &#0; &lt</p>',
+    '<p><![CDATA[ kept ]]></p><script><![CDATA[ also kept ]]></script>',
+    '<h1>outer<p>inner</h1>after</p>',
+    '<p>no end tag<h2>heading',
+    '<script type="application/ld+json">[{"@type":"Person","image":"/a.jpg"}]</script>'
+    '<script type="application/ld+json">{"@type":"Person","image":"/b.jpg"}</script>',
+    '<img src="/jane.jpg" alt="Jane"><img src="/doe-headshot.jpg" alt="Doe">',
+    '<meta property="og:image" content="/default-share.png"><img src="/x.jpg">',
+]
+
+def read_fixture(filename):
+    with open(os.path.join(FIXTURES_DIR, filename), encoding='utf-8') as f:
+        return f.read()
+
+@pytest.mark.parametrize('filename', sorted(FIXTURES))
+def test_fixture_matches_soup(filename):
+    url, name, image_url = FIXTURES[filename]
+    html = read_fixture(filename)
+
+    text, found_image = page_parser.extract(html, url, name)
+
+    assert (text, found_image) == parse_page_soup(html, url, name)
+    assert found_image == image_url
+    assert text
+
+@pytest.mark.parametrize('html', SNIPPETS)
+@pytest.mark.parametrize('url', ['https://www.linkedin.com/in/jane-doe', 'https://example.com/team/'])
+def test_snippet_matches_soup(html, url):
+    assert page_parser.extract(html, url, 'Jane Doe') == parse_page_soup(html, url, 'Jane Doe')
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Validate the photos of stored profiles.
+Profiles saved from a web search keep the page's best image unchecked
+(image_confidence 0). This job runs every unvalidated or low-confidence photo
+through the headshot check, a batch at a time, and writes each batch's
+results together with its checkpoint, so an interrupted run picks up where it
+stopped. It runs outside the web app and never slows down /search.
+
+Photos that pass get their confidence stored; rejected ones are replaced by
+fallback_image (usually nothing). Photos that couldn't be fetched or checked
+(network trouble, OpenAI errors) are left alone and retried on the next pass.
+If every model call in a batch fails with a transient error (an OpenAI
+outage, or a rejected API key) the run stops without moving its checkpoint
+past that batch.
+
+Usage: python validate_photos.py [--workers 4] [--openai-rpm 60] [--dry-run]
+"""
+import argparse
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import openai
+
+import database as db
+import image_probe
+import rate_limit
+import ai_bio_scraper
+from ai_bio_scraper import headshot_verdict, probe_image, fallback_image
+
+JOB_NAME = 'photo-validation'
+
+DEFAULT_WORKERS = 4
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_OPENAI_RPM = 60
+DEFAULT_HOST_RPM = 20
+# Same bar search_detail uses before falling back
+DEFAULT_MIN_CONFIDENCE = 50
+
+def is_transient_error(error):
+    """
+    Whether a failed model call says nothing about the photo: connection
+    trouble, rate limits, 5xx, or a rejected API key. These would fail for
+    every photo, so the run stops instead of skipping past them.
+    """
+    if isinstance(error, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError,
+                          openai.AuthenticationError, openai.PermissionDeniedError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+def check_photo(profile, min_confidence=DEFAULT_MIN_CONFIDENCE):
+    """
+    Check one profile's photo. Returns (outcome, detail): ('valid', confidence),
+    ('not_headshot', reason) from the model, ('rejected', reason) from the image
+    header, or ('unreachable' | 'error' | 'failed', message) for checks that
+    couldn't be made and are retried on the next pass. 'error' is a transient
+    model failure, 'failed' one that would most likely happen again.
+    """
+    photo_url = profile['photo_url']
+    sniffed = probe_image(photo_url)
+    if sniffed is None:
+        return 'unreachable', 'could not fetch the image'
+    reason = image_probe.reject_reason(sniffed)
+    if reason:
+        return 'rejected', reason
+
+    try:
+        is_valid, confidence = headshot_verdict(photo_url, profile['name'])
+        confidence = int(confidence)
+    except Exception as e:
+        return ('error' if is_transient_error(e) else 'failed'), str(e)
+
+    if is_valid and confidence >= min_confidence:
+        return 'valid', confidence
+    return 'not_headshot', f"not a headshot (confidence {confidence})"
+
+def validate_photos(workers=DEFAULT_WORKERS, batch_size=DEFAULT_BATCH_SIZE,
+                    min_confidence=DEFAULT_MIN_CONFIDENCE, restart=False, dry_run=False):
+    """Check every unvalidated or low-confidence photo, resuming from the last checkpoint"""
+    job = db.get_or_create_backfill_job(JOB_NAME, restart=restart)
+    checkpoint = job['checkpoint']
+    counts = Counter()
+    started = time.monotonic()
+    print(f"\n🖼️  Validating profile photos (after ID {checkpoint}) with {workers} workers"
+          f"{' - dry run, nothing is written' if dry_run else ''}\n", flush=True)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            batch = db.get_photos_to_validate(checkpoint, min_confidence, batch_size)
+            if not batch:
+                break
+
+            results = list(executor.map(lambda profile: check_photo(profile, min_confidence), batch))
+
+            updates = []
+            for profile, (outcome, detail) in zip(batch, results):
+                counts[outcome] += 1
+                if outcome == 'valid':
+                    updates.append((profile['id'], profile['photo_url'], profile['photo_url'], detail))
+                    print(f"[{profile['name']}] ✅ Photo confirmed ({detail})", flush=True)
+                elif outcome in ('rejected', 'not_headshot'):
+                    updates.append((profile['id'], profile['photo_url'], fallback_image(profile['name']), 0))
+                    print(f"[{profile['name']}] 🗑️  Photo dropped: {detail}", flush=True)
+                else:
+                    print(f"[{profile['name']}] ⚠️  Not checked: {detail}", flush=True)
+
+            # An outage fails every model call transiently - keep what was decided
+            # without a model (header rejections) but don't move past this batch
+            model_outcomes = [outcome for outcome, _ in results if outcome in ('valid', 'not_headshot', 'error', 'failed')]
+            if model_outcomes and all(outcome == 'error' for outcome in model_outcomes):
+                error = next(detail for outcome, detail in results if outcome == 'error')
+                if not dry_run:
+                    db.update_profile_photos(updates, JOB_NAME, checkpoint)
+                print(f"❌ Every headshot check in this batch failed ({error}); stopping at ID {checkpoint}. "
+                      f"Rerun to resume.", flush=True)
+                return counts
+
+            checkpoint = batch[-1]['id']
+            if not dry_run:
+                db.update_profile_photos(updates, JOB_NAME, checkpoint)
+
+            elapsed = time.monotonic() - started
+            done = sum(counts.values())
+            print(f"--- up to ID {checkpoint} | {done} checked | {done / elapsed * 60:.1f} photos/min | "
+                  f"valid {counts['valid']}, rejected {counts['rejected'] + counts['not_headshot']}, "
+                  f"not checked {counts['unreachable'] + counts['error'] + counts['failed']}", flush=True)
+
+    if not dry_run:
+        db.update_backfill_job(JOB_NAME, checkpoint, status='complete')
+    print(f"\n✅ Photo validation complete: {dict(counts)}", flush=True)
+    return counts
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Validate the photos of stored profiles")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="photos checked concurrently")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="profiles written per transaction")
+    parser.add_argument('--min-confidence', type=int, default=DEFAULT_MIN_CONFIDENCE,
+                        help="also recheck photos validated below this confidence")
+    parser.add_argument('--restart', action='store_true', help="ignore saved progress and start a new pass")
+    parser.add_argument('--dry-run', action='store_true', help="report what would change without writing")
+    parser.add_argument('--openai-rpm', type=float, default=DEFAULT_OPENAI_RPM, help="OpenAI calls per minute")
+    parser.add_argument('--host-rpm', type=float, default=DEFAULT_HOST_RPM, help="image fetches per minute to any one host")
+    args = parser.parse_args()
+
+    if ai_bio_scraper.client is None:
+        parser.error("OPENAI_API_KEY is not set; photos can't be checked without it")
+
+    rate_limit.configure('openai', args.openai_rpm)
+    rate_limit.configure('hosts', args.host_rpm)
+    validate_photos(workers=args.workers, batch_size=args.batch_size, min_confidence=args.min_confidence,
+                    restart=args.restart, dry_run=args.dry_run)